@@ -0,0 +1,839 @@
+"""Benchmarks for dataset generation and transforms
+
+Usage:
+    python benchmark.py [--persons 10000] [--chunk-rows 1000]
+        [--lookup-rows 1000] [--writer-persons 200]
+        [--timeseries-persons 1000] [--timeseries-iters 20]
+    python benchmark.py --suite [--sizes 100,1000,10000,50000]
+        [--skills 10,40] [--iterations 1,7] [--vary-persons 1000]
+        [--output benchmark_results.json] [--baseline PATH]
+        [--tolerance 0.25] [--no-tracemalloc]
+
+By default, micro benchmarks are run. Wide inputs are synthesized in memory
+from a mock personnel list, rather than read from 'input.csv'. Tidy and
+skill transforms are run over the wide input in chunks of wide rows, so
+that peak memory stays bounded even though the tidy dataset is 522 rows per
+wide row.
+
+With --suite, the suite for regression checks at scale is run instead. For
+each size, a synthetic personnel.txt of that many learners is written, and
+each hot path is run in turn on the previous stage's output:
+`generate_baseline_values`, `generate_timeseries`, `utils.save_csv`,
+`utils.load_csv`, `personnel_to_tidy.format_loaded_csv`, `tidy_up` and
+`tidy_to_skill.transform`. Stages after `generate_timeseries` run on the
+baseline timeslice, and `tidy_up` rows are counted rather than kept, so that
+memory stays bounded. Even so, 50,000 learners need several GB of memory.
+
+Skill count is varied for the stages after generation, on a wide dataset of
+the first N skills, as generation always creates every skill. The number of
+time series iterations is varied for `generate_timeseries`.
+
+Each suite stage is timed, then run again under tracemalloc for its peak
+Python allocation. Peak RSS is that of the whole process so far. Results
+are saved as JSON, and can be compared against a previous results file, e.g.
+one stored from a known good commit: stages which got slower or bigger by
+more than the tolerance are reported, and the exit status is 1.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import tracemalloc
+from datetime import date, datetime
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from config import SKILL_DATA_FIELDS, SKILLS
+from create_new_personnel_dataset import CONFIG as PERSONNEL_CONFIG, \
+    COMPOSITE_ID_FIELDS, HEADER, SCORER_TYPES, generate_baseline_values, \
+    generate_timeseries, get_mutation_funcs, get_personnel_list
+from instrumentation import get_max_rss
+from schema import SKILL_FIELD_PARTS, get_schema
+from utils import CSV_COMPRESSIONS, OUTPUT_FORMATS, import_optional, \
+    load_csv, save_csv, save_dataset
+
+SIZES: List[int] = [100, 1000, 10000, 50000]
+SKILL_COUNTS: List[int] = [10, 40]
+ITERATIONS: List[int] = [1, 7]
+VARY_PERSONS: int = 1000
+TOLERANCE: float = 0.25
+# differences smaller than these are noise, not regressions
+MIN_SECONDS: float = 0.05
+MIN_BYTES: int = 1000000
+SEED: int = 0
+
+
+def mock_personnel(num_persons: int) -> List[str]:
+    """Get a mock personnel list
+
+    Args:
+        num_persons (int): Number of learners
+
+    Returns:
+        list: Personnel names
+    """
+    return ['Person {:06d}'.format(i) for i in range(num_persons)]
+
+
+def mock_wide_rows(
+    personnel: List[str],
+    row_date: date = date(2019, 9, 1),
+) -> Iterator[List[Any]]:
+    """Get formatted wide personnel rows with random values
+
+    Args:
+        personnel (list): Personnel names
+        row_date (date): Date of every row
+
+    Returns:
+        iter: Wide rows, not including header
+    """
+    schema = get_schema(HEADER)
+    notes_indices: List[int] = schema.indices_by_field_type['notes']
+    int_indices: List[int] = [
+        x.index for x in schema.skill_columns if x.field_type != 'notes']
+    for person in personnel:
+        for scorer in SCORER_TYPES:
+            row: List[Any] = [row_date, person, scorer] \
+                + [None] * len(SKILL_DATA_FIELDS)
+            for idx, val in zip(int_indices, random.choices(
+                    range(1, 6), k=len(int_indices))):
+                row[idx] = val
+            for idx in notes_indices:
+                row[idx] = 'This is a miscellaneous note.'
+            yield row
+
+
+def chunks(rows: Iterator[List[Any]], size: int) -> Iterator[List[Any]]:
+    """Split rows into lists of given size
+
+    Args:
+        rows (iter): Rows
+        size (int): Rows per chunk
+
+    Returns:
+        iter: Chunks of rows
+    """
+    chunk: List[Any] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def timed(func: Callable, *args, **kwargs) -> float:
+    """Time a function call
+
+    Returns:
+        float: Seconds elapsed
+    """
+    start: float = perf_counter()
+    func(*args, **kwargs)
+    return perf_counter() - start
+
+
+def bench_column_lookups(num_rows: int) -> Dict[str, float]:
+    """Compare per-row column resolution by name against a precomputed plan
+
+    Each wide row of a tidy-up resolves every skill data field's column, skill
+    and field type.
+
+    Args:
+        num_rows (int): Number of wide rows to resolve columns for
+
+    Returns:
+        dict: Seconds for each approach
+    """
+    def by_name():
+        for _ in range(num_rows):
+            for field in SKILL_DATA_FIELDS:
+                skill: str = field.split('_')[0]
+                field.replace(skill + '_', '')
+                HEADER.index(field)
+
+    def by_plan():
+        schema = get_schema(HEADER)
+        for _ in range(num_rows):
+            for column in schema.skill_columns:
+                column.index, column.skill, column.field_type
+
+    return {'by_name': timed(by_name), 'by_plan': timed(by_plan)}
+
+
+def bench_transforms(
+    num_persons: int,
+    chunk_rows: int,
+) -> Dict[str, float]:
+    """Time tidy and skill transforms over a wide input
+
+    Args:
+        num_persons (int): Number of learners in the wide input
+        chunk_rows (int): Wide rows per chunk
+
+    Returns:
+        dict: Seconds for each transform
+    """
+    from personnel_to_tidy import tidy_up
+    from tidy_to_skill import transform
+
+    results: Dict[str, float] = {'tidy_up': 0.0, 'transform': 0.0}
+    wide_rows = mock_wide_rows(mock_personnel(num_persons))
+    for chunk in chunks(wide_rows, chunk_rows):
+        start: float = perf_counter()
+        tidy: List[List[Any]] = list(tidy_up([HEADER] + chunk))
+        results['tidy_up'] += perf_counter() - start
+        start = perf_counter()
+        transform(tidy)
+        results['transform'] += perf_counter() - start
+        del tidy
+
+    return results
+
+
+def bench_timeseries(
+    num_persons: int,
+    iterations: int,
+) -> Dict[str, float]:
+    """Compare time series mutation modes, on one baseline
+
+    Batched mutation with the python engine applies its draws with NumPy, if
+    installed. The numpy engine is skipped if it is not.
+
+    Args:
+        num_persons (int): Number of learners
+        iterations (int): Number of time series iterations
+
+    Returns:
+        dict: Seconds for each mode
+    """
+    config: Dict[str, Any] = {**PERSONNEL_CONFIG, 'seed': SEED}
+    baseline: List[List[Any]] = generate_baseline_values(
+        personnel=mock_personnel(num_persons), config=config,
+        rng=random.Random(SEED))
+    modes: Dict[str, Dict[str, Any]] = {
+        'per_cell': {'engine': 'python', 'timeseries_mode': 'per_cell'},
+        'batched': {'engine': 'python', 'timeseries_mode': 'batched'}}
+    if import_optional('numpy') is not None:
+        modes['batched, numpy engine'] = \
+            {'engine': 'numpy', 'timeseries_mode': 'batched'}
+
+    results: Dict[str, float] = {}
+    for name, options in modes.items():
+        np_rng: Any = None
+        if options['engine'] == 'numpy':
+            np_rng = import_optional('numpy').random.default_rng(SEED)
+        results[name] = timed(
+            generate_timeseries,
+            baseline=baseline,
+            timeseries_months_step=config[
+                'progression_timeseries_months_step'],
+            timeseries_iters=iterations,
+            start_date=config['start_date'],
+            date_index=HEADER.index('Date'),
+            **get_mutation_funcs({**config, **options},
+                                 random.Random(SEED), np_rng))
+
+    return results
+
+
+def bench_tidy_memory(num_persons: int) -> Dict[str, Dict[str, float]]:
+    """Compare a tidy dataset as a list of rows against a TidyTable
+
+    Args:
+        num_persons (int): Number of learners
+
+    Returns:
+        dict: Seconds and bytes allocated, by representation
+    """
+    from personnel_to_tidy import tidy_up, tidy_up_table
+
+    wide: List[List[Any]] = \
+        [HEADER] + list(mock_wide_rows(mock_personnel(num_persons)))
+    representations: Dict[str, Callable] = {
+        'list': lambda: list(tidy_up(wide)),
+        'TidyTable': lambda: tidy_up_table(wide)}
+    results: Dict[str, Dict[str, float]] = {}
+    for name, func in representations.items():
+        tracemalloc.start()
+        start: float = perf_counter()
+        dataset: Any = func()
+        seconds: float = perf_counter() - start
+        results[name] = {
+            'seconds': seconds,
+            'bytes': tracemalloc.get_traced_memory()[0]}
+        tracemalloc.stop()
+        del dataset
+
+    return results
+
+
+def get_size(path: str) -> int:
+    """Get size of a file, or of all files in a directory
+
+    Args:
+        path (str): Path to file or directory
+
+    Returns:
+        int: Size in bytes
+    """
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    return sum(os.path.getsize(os.path.join(path, x))
+               for x in os.listdir(path))
+
+
+def bench_writers(num_persons: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Time and size each output format for wide and tidy datasets
+
+    Formats whose dependencies are not installed are skipped.
+
+    Args:
+        num_persons (int): Number of learners
+
+    Returns:
+        dict: Seconds and bytes, by dataset, then by output format
+    """
+    from personnel_to_tidy import tidy_up
+
+    wide: List[List[Any]] = \
+        [HEADER] + list(mock_wide_rows(mock_personnel(num_persons)))
+    datasets: Dict[str, List[List[Any]]] = {
+        'personnel': wide,
+        'tidy': list(tidy_up(wide))}
+    available: Dict[str, bool] = {
+        'csv': True,
+        'parquet': import_optional('pyarrow') is not None,
+        'feather': import_optional('pyarrow') is not None,
+        'npy': import_optional('numpy') is not None,
+        'xlsx': import_optional('openpyxl') is not None,
+        'sqlite': True}
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, dataset in datasets.items():
+            results[name] = {}
+            for output_format in OUTPUT_FORMATS:
+                if not available[output_format]:
+                    continue
+                start: float = perf_counter()
+                output_path: str = save_dataset(
+                    dataset, os.path.join(output_dir, name + '.csv'),
+                    output_format)
+                results[name][output_format] = {
+                    'seconds': perf_counter() - start,
+                    'bytes': get_size(output_path)}
+
+    return results
+
+
+def bench_csv_writer(num_persons: int) -> Dict[str, float]:
+    """Compare csv.writer against save_csv, in rows per second, on a tidy
+    dataset
+
+    zstd is skipped if zstandard is not installed. save_csv is also timed
+    without its background writer thread.
+
+    Args:
+        num_persons (int): Number of learners
+
+    Returns:
+        dict: Rows per second, for csv.writer and each save_csv option
+    """
+    from personnel_to_tidy import tidy_up
+
+    tidy: List[List[Any]] = list(tidy_up(
+        [HEADER] + list(mock_wide_rows(mock_personnel(num_persons)))))
+
+    def csv_writer(path: str):
+        with open(path, 'w+') as f:
+            csv.writer(f, delimiter=',').writerows(tidy)
+
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        path: str = os.path.join(output_dir, 'tidy.csv')
+        results['csv.writer'] = len(tidy) / timed(csv_writer, path)
+        for compression in CSV_COMPRESSIONS:
+            if compression == 'zstd' \
+                    and import_optional('zstandard') is None:
+                continue
+            results['save_csv, ' + compression] = \
+                len(tidy) / timed(save_csv, tidy, path, compression)
+        results['save_csv, none, without writer thread'] = \
+            len(tidy) / timed(save_csv, tidy, path, 'none', False)
+
+    return results
+
+
+def run(
+    num_persons: int,
+    chunk_rows: int,
+    lookup_rows: int,
+    writer_persons: int,
+    timeseries_persons: int = 1000,
+    timeseries_iters: int = 20,
+):
+    """Run the benchmarks and print results
+
+    Args:
+        num_persons (int): Number of learners
+        chunk_rows (int): Wide rows per chunk
+        lookup_rows (int): Wide rows to resolve columns for
+        writer_persons (int): Number of learners to save datasets of
+        timeseries_persons (int): Number of learners to generate time
+        series of
+        timeseries_iters (int): Number of time series iterations
+    """
+    lookups: Dict[str, float] = bench_column_lookups(lookup_rows)
+    print('column lookups, {} wide rows:'.format(lookup_rows))
+    print('  by name: {:.3f}s'.format(lookups['by_name']))
+    print('  by plan: {:.3f}s ({:.1f}x)'.format(
+        lookups['by_plan'], lookups['by_name'] / lookups['by_plan']))
+
+    timeseries: Dict[str, float] = \
+        bench_timeseries(timeseries_persons, timeseries_iters)
+    print('time series, {} learners, {} iterations:'.format(
+        timeseries_persons, timeseries_iters))
+    for name, seconds in timeseries.items():
+        print('  {}: {:.3f}s ({:.1f}x per_cell)'.format(
+            name, seconds, timeseries['per_cell'] / seconds))
+
+    transforms: Dict[str, float] = bench_transforms(num_persons, chunk_rows)
+    print('transforms, {} learners:'.format(num_persons))
+    for name, seconds in transforms.items():
+        print('  {}: {:.3f}s'.format(name, seconds))
+
+    memory: Dict[str, Dict[str, float]] = bench_tidy_memory(writer_persons)
+    print('tidy dataset in memory, {} learners:'.format(writer_persons))
+    for name, result in memory.items():
+        print('  {}: {:.3f}s, {:.1f} MB ({:.2f}x list size)'.format(
+            name, result['seconds'], result['bytes'] / 1e6,
+            result['bytes'] / memory['list']['bytes']))
+
+    writers = bench_writers(writer_persons)
+    for name, formats in writers.items():
+        print('saving {} dataset, {} learners:'.format(name, writer_persons))
+        for output_format, result in formats.items():
+            print('  {}: {:.3f}s, {:.1f} MB ({:.2f}x csv size)'.format(
+                output_format, result['seconds'], result['bytes'] / 1e6,
+                result['bytes'] / formats['csv']['bytes']))
+
+    csv_writers: Dict[str, float] = bench_csv_writer(writer_persons)
+    print('saving tidy csv, {} learners:'.format(writer_persons))
+    for name, rows_per_second in csv_writers.items():
+        print('  {}: {:,.0f} rows/s ({:.2f}x csv.writer)'.format(
+            name, rows_per_second,
+            rows_per_second / csv_writers['csv.writer']))
+
+
+def measure(
+    func: Callable,
+    *args,
+    trace_memory: bool = True,
+) -> Tuple[Any, Dict[str, float]]:
+    """Time a function call, then repeat it under tracemalloc
+
+    Args:
+        func (func): Function to call
+        *args: Arguments to call function with
+        trace_memory (bool): Repeat the call to measure peak allocation?
+
+    Returns:
+        tuple: Result of the timed call, and dict of 'seconds',
+        'tracemalloc_peak_bytes' (if traced) and 'max_rss_bytes'
+    """
+    start: float = perf_counter()
+    result: Any = func(*args)
+    metrics: Dict[str, float] = {'seconds': perf_counter() - start}
+    if trace_memory:
+        tracemalloc.start()
+        func(*args)
+        metrics['tracemalloc_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    metrics['max_rss_bytes'] = get_max_rss()
+
+    return result, metrics
+
+
+def write_personnel_file(num_persons: int, path: str):
+    """Write a synthetic personnel list
+
+    Args:
+        num_persons (int): Number of learners
+        path (str): Path to save '\n' delimited text file
+
+    Side effects:
+        - Saves text file
+    """
+    with open(path, 'w') as f:
+        f.writelines(x + '\n' for x in mock_personnel(num_persons))
+
+
+def select_skills(
+    dataset: List[List[Any]],
+    num_skills: int,
+) -> List[List[Any]]:
+    """Keep only the first skills' columns of a wide dataset
+
+    Args:
+        dataset (list): Wide dataset, including header
+        num_skills (int): Number of skills to keep
+
+    Returns:
+        list: Wide dataset, including header
+    """
+    skills = set(SKILLS[:num_skills])
+    indices: List[int] = [
+        idx for idx, field in enumerate(dataset[0])
+        if field in COMPOSITE_ID_FIELDS
+        or SKILL_FIELD_PARTS.get(field, ('',))[0] in skills]
+
+    return [[row[x] for x in indices] for row in dataset]
+
+
+def count_tidy_rows(wide: List[List[Any]]) -> int:
+    """Tidy up a wide dataset, counting rather than keeping tidy rows
+
+    Args:
+        wide (list): Wide dataset, including header
+
+    Returns:
+        int: Number of tidy rows, not including header
+    """
+    from personnel_to_tidy import tidy_up
+
+    return sum(1 for _ in tidy_up(wide)) - 1
+
+
+def bench_pipeline(
+    wide: List[List[Any]],
+    work_dir: str,
+    trace_memory: bool = True,
+) -> Dict[str, Dict[str, float]]:
+    """Benchmark saving, loading, formatting and transforming a wide dataset
+
+    Args:
+        wide (list): Wide dataset, including header. Emptied as it is used,
+        to free memory.
+        work_dir (str): Directory to save CSV in
+        trace_memory (bool): Measure peak allocation of each stage?
+
+    Returns:
+        dict: Metrics by stage
+    """
+    from personnel_to_tidy import format_loaded_csv, tidy_up_table
+    from tidy_to_skill import transform
+
+    results: Dict[str, Dict[str, float]] = {}
+    num_rows: int = len(wide) - 1
+    path: str = os.path.join(work_dir, 'personnel.csv')
+
+    _, results['save_csv'] = measure(
+        save_csv, wide, path, trace_memory=trace_memory)
+    results['save_csv']['rows'] = num_rows
+    del wide[:]
+
+    raw, results['load_csv'] = measure(
+        load_csv, path, trace_memory=trace_memory)
+    results['load_csv']['rows'] = num_rows
+
+    formatted, results['format_loaded_csv'] = measure(
+        format_loaded_csv, raw, '%Y-%m-%d', trace_memory=trace_memory)
+    results['format_loaded_csv']['rows'] = num_rows
+    del raw
+
+    num_tidy_rows, results['tidy_up'] = measure(
+        count_tidy_rows, formatted, trace_memory=trace_memory)
+    results['tidy_up']['rows'] = num_tidy_rows
+
+    table = tidy_up_table(formatted)
+    del formatted
+    skill, results['transform'] = measure(
+        transform, table, trace_memory=trace_memory)
+    results['transform']['rows'] = len(skill) - 1
+
+    return results
+
+
+def bench_generation(
+    personnel_path: str,
+    iterations: int,
+    trace_memory: bool = True,
+) -> Tuple[List[List[Any]], Dict[str, Dict[str, float]]]:
+    """Benchmark generating a baseline and a time series from it
+
+    Args:
+        personnel_path (str): Path to personnel list
+        iterations (int): Number of time series iterations
+        trace_memory (bool): Measure peak allocation of each stage?
+
+    Returns:
+        tuple: Baseline, and metrics by stage
+    """
+    config: Dict[str, Any] = {
+        **PERSONNEL_CONFIG, 'engine': 'python', 'seed': SEED,
+        'input_personnel_list_path': personnel_path}
+    personnel: List[str] = get_personnel_list(personnel_path)
+    results: Dict[str, Dict[str, float]] = {}
+
+    baseline, results['generate_baseline_values'] = measure(
+        lambda: generate_baseline_values(
+            personnel=personnel, config=config, rng=random.Random(SEED)),
+        trace_memory=trace_memory)
+    results['generate_baseline_values']['rows'] = len(baseline)
+
+    def timeseries() -> int:
+        return len(generate_timeseries(
+            baseline=baseline,
+            timeseries_months_step=config[
+                'progression_timeseries_months_step'],
+            timeseries_iters=iterations,
+            start_date=config['start_date'],
+            date_index=HEADER.index('Date'),
+            **get_mutation_funcs(config, rng=random.Random(SEED))))
+
+    num_rows, results['generate_timeseries'] = \
+        measure(timeseries, trace_memory=trace_memory)
+    results['generate_timeseries']['rows'] = num_rows
+
+    return baseline, results
+
+
+def run_suite(
+    sizes: List[int] = SIZES,
+    skill_counts: List[int] = SKILL_COUNTS,
+    iterations: List[int] = ITERATIONS,
+    vary_persons: int = VARY_PERSONS,
+    trace_memory: bool = True,
+) -> Dict[str, Any]:
+    """Run the benchmark suite
+
+    Args:
+        sizes (list): Numbers of learners to run every stage for
+        skill_counts (list): Numbers of skills to run transform stages for
+        iterations (list): Numbers of time series iterations to run
+        `generate_timeseries` for
+        vary_persons (int): Number of learners when varying skills or
+        iterations
+        trace_memory (bool): Measure peak allocation of each stage?
+
+    Returns:
+        dict: 'meta' information about the run, and 'results', metrics by
+        case, then by stage
+    """
+    default_iterations: int = \
+        PERSONNEL_CONFIG['progression_timeseries_iters']
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        personnel_path: str = os.path.join(work_dir, 'personnel.txt')
+        for num_persons in sizes:
+            case: str = 'persons={}'.format(num_persons)
+            print('Running {}'.format(case))
+            write_personnel_file(num_persons, personnel_path)
+            baseline, results[case] = bench_generation(
+                personnel_path, default_iterations, trace_memory)
+            results[case].update(bench_pipeline(
+                [HEADER] + baseline, work_dir, trace_memory))
+            del baseline
+
+        write_personnel_file(vary_persons, personnel_path)
+        for num_iterations in iterations:
+            case: str = 'persons={},iterations={}'.format(
+                vary_persons, num_iterations)
+            print('Running {}'.format(case))
+            _, generation_results = bench_generation(
+                personnel_path, num_iterations, trace_memory)
+            results[case] = {
+                'generate_timeseries':
+                    generation_results['generate_timeseries']}
+
+        baseline, _ = bench_generation(personnel_path, 0, False)
+        for num_skills in skill_counts:
+            case: str = 'persons={},skills={}'.format(
+                vary_persons, num_skills)
+            print('Running {}'.format(case))
+            results[case] = bench_pipeline(
+                select_skills([HEADER] + baseline, num_skills), work_dir,
+                trace_memory)
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'skill_counts': skill_counts,
+            'iterations': iterations,
+            'vary_persons': vary_persons},
+        'results': results}
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = TOLERANCE,
+) -> List[str]:
+    """Find regressions against a baseline results file
+
+    Only cases and stages in both are compared.
+
+    Args:
+        results (dict): Results of `run_suite`
+        baseline (dict): Previous results of `run_suite`
+        tolerance (float): Fraction by which seconds or peak bytes may grow
+
+    Returns:
+        list: Description of each regression
+    """
+    metrics: Dict[str, float] = {
+        'seconds': MIN_SECONDS,
+        'tracemalloc_peak_bytes': MIN_BYTES}
+    regressions: List[str] = []
+    for case, stages in results['results'].items():
+        for stage, result in stages.items():
+            previous: Dict[str, float] = \
+                baseline['results'].get(case, {}).get(stage)
+            if previous is None:
+                continue
+            for metric, min_difference in metrics.items():
+                if metric not in result or metric not in previous:
+                    continue
+                if result[metric] > previous[metric] * (1 + tolerance) \
+                        and result[metric] - previous[metric] \
+                        > min_difference:
+                    regressions.append(
+                        '{} {}: {} {:.3g} -> {:.3g} ({:+.0%})'.format(
+                            case, stage, metric, previous[metric],
+                            result[metric],
+                            result[metric] / previous[metric] - 1))
+
+    return regressions
+
+
+def print_results(results: Dict[str, Any]):
+    """Print results as a table
+
+    Args:
+        results (dict): Results of `run_suite`
+    """
+    row_format: str = '{:<28} {:<26} {:>10} {:>12} {:>12} {:>12}'
+    print(row_format.format(
+        'case', 'stage', 'seconds', 'rows/s', 'peak MB', 'max RSS MB'))
+    for case, stages in results['results'].items():
+        for stage, result in stages.items():
+            print(row_format.format(
+                case, stage, '{:.3f}'.format(result['seconds']),
+                '{:,.0f}'.format(result['rows'] / result['seconds'])
+                if result['seconds'] else '',
+                '{:.1f}'.format(result['tracemalloc_peak_bytes'] / 1e6)
+                if 'tracemalloc_peak_bytes' in result else '',
+                '{:.1f}'.format(result['max_rss_bytes'] / 1e6)))
+
+
+def int_list(value: str) -> List[int]:
+    """Parse a comma separated list of integers
+
+    Args:
+        value (str): E.g. '100,1000'
+
+    Returns:
+        list: Integers
+    """
+    return [int(x) for x in value.split(',') if x]
+
+
+def main(argv: List[str] = None):
+    """Command line entry point
+
+    Args:
+        argv (list): Command line arguments
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--persons', type=int, default=10000,
+                        help='Number of learners (default: %(default)s)')
+    parser.add_argument('--chunk-rows', type=int, default=1000,
+                        help='Wide rows per transform chunk '
+                             '(default: %(default)s)')
+    parser.add_argument('--lookup-rows', type=int, default=1000,
+                        help='Wide rows to resolve columns for in the lookup '
+                             'benchmark (default: %(default)s)')
+    parser.add_argument('--writer-persons', type=int, default=200,
+                        help='Number of learners to save datasets of in the '
+                             'output format benchmark (default: %(default)s)')
+    parser.add_argument('--timeseries-persons', type=int, default=1000,
+                        help='Number of learners to generate time series of '
+                             '(default: %(default)s)')
+    parser.add_argument('--timeseries-iters', type=int, default=20,
+                        help='Number of time series iterations to generate '
+                             '(default: %(default)s)')
+    suite = parser.add_argument_group('suite')
+    suite.add_argument(
+        '--suite', action='store_true',
+        help='Run the suite for regression checks at scale, rather than the '
+             'micro benchmarks')
+    suite.add_argument(
+        '--sizes', type=int_list, default=SIZES,
+        help='Comma separated numbers of learners (default: {})'.format(
+            ','.join(str(x) for x in SIZES)))
+    suite.add_argument(
+        '--skills', type=int_list, default=SKILL_COUNTS,
+        help='Comma separated numbers of skills (default: {})'.format(
+            ','.join(str(x) for x in SKILL_COUNTS)))
+    suite.add_argument(
+        '--iterations', type=int_list, default=ITERATIONS,
+        help='Comma separated numbers of time series iterations '
+             '(default: {})'.format(','.join(str(x) for x in ITERATIONS)))
+    suite.add_argument(
+        '--vary-persons', type=int, default=VARY_PERSONS,
+        help='Number of learners when varying skills or iterations '
+             '(default: %(default)s)')
+    suite.add_argument(
+        '-o', '--output', default='benchmark_results.json', metavar='PATH',
+        help='Path to save JSON results (default: %(default)s)')
+    suite.add_argument(
+        '--baseline', metavar='PATH',
+        help='Path to JSON results to compare against')
+    suite.add_argument(
+        '--tolerance', type=float, default=TOLERANCE,
+        help='Fraction by which a stage may get slower or bigger than the '
+             'baseline (default: %(default)s)')
+    suite.add_argument(
+        '--no-tracemalloc', dest='trace_memory', action='store_false',
+        help='Do not repeat each stage to measure peak allocation')
+    args = parser.parse_args(argv)
+    if not args.suite:
+        run(num_persons=args.persons, chunk_rows=args.chunk_rows,
+            lookup_rows=args.lookup_rows, writer_persons=args.writer_persons,
+            timeseries_persons=args.timeseries_persons,
+            timeseries_iters=args.timeseries_iters)
+        return
+
+    results: Dict[str, Any] = run_suite(
+        sizes=args.sizes, skill_counts=args.skills,
+        iterations=args.iterations, vary_persons=args.vary_persons,
+        trace_memory=args.trace_memory)
+    print_results(results)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Saved to: ' + args.output)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline: Dict[str, Any] = json.load(f)
+        regressions: List[str] = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print('Regression: ' + regression)
+        if regressions:
+            sys.exit(1)
+        print('No regressions against ' + args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+"""Create many variants of the mock personnel dataset in one run
+
+Each scenario is a dictionary of CONFIG overrides, e.g.
+`{"mutation_pct_chance": 0.5, "seed": 7}`, and is saved to its own output.
+Personnel lists are read once. Scenarios which differ only in time series
+options, see TIMESERIES_CONFIG_KEYS, share one baseline: it is generated
+once, and each scenario's time series is generated from it, with random
+generators restored to the state they were left in by generating it. So
+each scenario's output is the same as that of
+`create_new_personnel_dataset.py` with the same options.
+
+Usage:
+    1. Save a JSON list of scenarios, e.g. "scenarios.json":
+     `[{"mutation_pct_chance": 0.1}, {"mutation_pct_chance": 0.5}]`
+    2. Run `python create_new_scenario_datasets.py --scenarios scenarios.json`
+    Options given on the command line apply to every scenario, unless it
+    overrides them. Scenarios without an 'output_file_path' are saved to the
+    output path suffixed with their index, e.g. "output_0.csv".
+"""
+import argparse
+import json
+import os
+from datetime import date
+from itertools import chain
+from random import Random, SystemRandom
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from create_new_personnel_dataset import CONFIG as PERSONNEL_CONFIG, \
+    GENERATION_CONFIG_KEYS, HEADER, generate_baseline, get_parser, \
+    get_personnel_list, get_seeded_shards, get_shard_rngs, \
+    iter_shard_timeslices, parse_args, resolve_engine
+from instrumentation import run_profiled, stage
+from utils import import_optional, save_dataset
+
+
+CONFIG: Dict[str, Any] = {
+    **PERSONNEL_CONFIG,
+    'scenarios_file_path': './scenarios.json',
+}
+# Options which only change the time series, not the baseline
+TIMESERIES_CONFIG_KEYS: List[str] = [
+    'mutation_min_increment', 'mutation_max_increment', 'mutation_pct_chance',
+    'progression_timeseries_months_step', 'progression_timeseries_iters',
+    'timeseries_mode', 'timeseries_cumulative']
+# Options which change the baseline
+BASELINE_CONFIG_KEYS: List[str] = [
+    x for x in GENERATION_CONFIG_KEYS if x not in TIMESERIES_CONFIG_KEYS] \
+    + ['shard_size', 'input_personnel_list_path']
+# Options of a batch, rather than of a scenario
+UNSUPPORTED_SCENARIO_KEYS: List[str] = [
+    'workers', 'incremental', 'chunked', 'extend_iters', 'special_field_funcs',
+    'scenarios_file_path']
+
+# Baseline of each shard, and the state of its random generators after, by
+# baseline key. Only the last key's are kept, per process.
+_shard_baselines: Dict[Any, List[Tuple[List[List[Any]], Any, Any]]] = {}
+
+
+def load_scenarios(
+    path: str = CONFIG['scenarios_file_path'],
+) -> List[Dict[str, Any]]:
+    """Load scenarios from a JSON file
+
+    Args:
+        path (str): Path to JSON list of CONFIG overrides. Dates, e.g.
+        'start_date', are given as 'YYYY-MM-DD' strings.
+
+    Raises:
+        ValueError: If file is not a list of objects
+
+    Returns:
+        list: Scenarios
+    """
+    with open(path) as f:
+        scenarios: Any = json.load(f)
+    if not isinstance(scenarios, list) \
+            or not all(isinstance(x, dict) for x in scenarios):
+        raise ValueError('Scenarios file must be a list of objects: ' + path)
+    for scenario in scenarios:
+        if isinstance(scenario.get('start_date'), str):
+            scenario['start_date'] = date.fromisoformat(scenario['start_date'])
+
+    return scenarios
+
+
+def get_scenario_configs(
+    scenarios: List[Dict[str, Any]],
+    config: Dict[str, Any] = CONFIG,
+) -> List[Dict[str, Any]]:
+    """Get the full configuration of each scenario
+
+    Scenarios without a seed are all given the same random seed, so that
+    they can share a baseline too.
+
+    Args:
+        scenarios (list): CONFIG overrides of each scenario
+        config (dict): Options of every scenario, unless overridden
+
+    Raises:
+        ValueError: If a scenario has an unknown option, or one which only
+        applies to a batch, see UNSUPPORTED_SCENARIO_KEYS
+
+    Returns:
+        list: Configuration of each scenario
+    """
+    seed: int = config['seed'] if config['seed'] is not None \
+        else SystemRandom().getrandbits(64)
+    root, extension = os.path.splitext(config['output_file_path'])
+    scenario_configs: List[Dict[str, Any]] = []
+    for i, scenario in enumerate(scenarios):
+        for key in scenario:
+            if key not in CONFIG or key in UNSUPPORTED_SCENARIO_KEYS:
+                raise ValueError('Option "{}" of scenario {} cannot be set '
+                                 'per scenario.'.format(key, i))
+        scenario_config: Dict[str, Any] = {
+            **config,
+            'output_file_path': '{}_{}{}'.format(root, i, extension),
+            **scenario}
+        if scenario_config['seed'] is None:
+            scenario_config['seed'] = seed
+        scenario_configs.append(scenario_config)
+
+    return scenario_configs
+
+
+def get_baseline_key(
+    config: Dict[str, Any],
+    personnel: List[str],
+) -> Any:
+    """Get the key of the baseline a scenario is generated from
+
+    Args:
+        config (dict): Scenario's configuration
+        personnel (list): Scenario's personnel
+
+    Returns:
+        Hashable key, the same for scenarios with the same baseline
+    """
+    options: Dict[str, Any] = {x: config[x] for x in BASELINE_CONFIG_KEYS}
+    options['engine'] = resolve_engine(config['engine'])
+
+    return repr(sorted(options.items())), tuple(personnel)
+
+
+def get_shard_baselines(
+    config: Dict[str, Any],
+    personnel: List[str],
+) -> List[Tuple[List[List[Any]], Any, Any]]:
+    """Get the baseline of each shard of a scenario, generating them only if
+    they were not for the previous scenario
+
+    Args:
+        config (dict): Scenario's configuration
+        personnel (list): Scenario's personnel
+
+    Returns:
+        list: Baseline of each shard, with the state of its random.Random,
+        and of its numpy.random.Generator or None, after generating it
+    """
+    key: Any = get_baseline_key(config, personnel)
+    if key not in _shard_baselines:
+        _shard_baselines.clear()
+        shard_baselines: List[Tuple[List[List[Any]], Any, Any]] = []
+        for shard, shard_seed in zip(*get_seeded_shards(config, personnel)):
+            rng, np_rng = get_shard_rngs(config, shard_seed)
+            baseline: List[List[Any]] = generate_baseline(
+                personnel=shard,
+                config=config,
+                rng=rng,
+                np_rng=np_rng)
+            shard_baselines.append((
+                baseline, rng.getstate(),
+                np_rng.bit_generator.state if np_rng is not None else None))
+        _shard_baselines[key] = shard_baselines
+
+    return _shard_baselines[key]
+
+
+def generate_scenario(
+    config: Dict[str, Any],
+    personnel: List[str],
+) -> Iterator[List[Any]]:
+    """Generate a scenario's dataset, from a shared baseline
+
+    Args:
+        config (dict): Scenario's configuration
+        personnel (list): Scenario's personnel
+
+    Returns:
+        iter: Dataset rows, not including header, in the same order as
+        `create_new_personnel_dataset.generate_dataset`
+    """
+    shard_timeslices: List[Iterable[List[List[Any]]]] = []
+    for baseline, state, np_state in get_shard_baselines(config, personnel):
+        rng: Random = Random()
+        rng.setstate(state)
+        np_rng: Any = None
+        if np_state is not None:
+            np_rng = import_optional('numpy').random.default_rng()
+            np_rng.bit_generator.state = np_state
+        shard_timeslices.append(chain(
+            [baseline], iter_shard_timeslices(baseline, config, rng, np_rng)))
+
+    for timeslices in zip(*shard_timeslices):
+        for timeslice_dataset in timeslices:
+            yield from timeslice_dataset
+
+
+def save_scenario(
+    config: Dict[str, Any],
+    personnel: List[str],
+) -> str:
+    """Generate and save a scenario's dataset
+
+    Args:
+        config (dict): Scenario's configuration
+        personnel (list): Scenario's personnel
+
+    Side effects:
+        - Saves output file(s)
+
+    Returns:
+        str: Path saved to
+    """
+    data: Iterator[List[Any]] = generate_scenario(config, personnel)
+    dataset: Iterable[List[Any]] = \
+        chain([HEADER], data) if config['include_header'] else data
+    with stage('save'):
+        return save_dataset(
+            array=dataset,
+            path=config['output_file_path'],
+            output_format=config['output_format'],
+            compression=config['output_compression'],
+            sheet_name=config['output_sheet_name'],
+            partition_by=config['output_partition_by'],
+            rows_per_part=config['output_rows_per_part'])
+
+
+def _save_scenario_in_worker(
+    config: Dict[str, Any],
+    personnel: List[str],
+) -> str:
+    """Generate and save a scenario's dataset in a worker process
+
+    Args:
+        config (dict): Picklable configuration options, overriding CONFIG
+        personnel (list): Scenario's personnel
+
+    Returns:
+        str: Path saved to
+    """
+    return save_scenario({**CONFIG, **config}, personnel)
+
+
+def generate_scenarios(
+    scenarios: List[Dict[str, Any]],
+    config: Dict[str, Any] = CONFIG,
+) -> List[str]:
+    """Generate and save the dataset of each scenario
+
+    Scenarios are generated in order of baseline, so that each baseline is
+    generated once. With more than one config['workers'], scenarios are
+    spread over a process pool, and each process generates the baselines of
+    the scenarios it is given. Shards of a scenario are then generated in
+    the scenario's process. Output is the same for any number of workers.
+
+    Args:
+        scenarios (list): CONFIG overrides of each scenario, see
+        `get_scenario_configs`
+        config (dict): Options of every scenario, unless overridden
+
+    Side effects:
+        - Saves output file(s) of each scenario
+
+    Returns:
+        list: Path each scenario was saved to, in order of scenarios
+    """
+    scenario_configs: List[Dict[str, Any]] = \
+        get_scenario_configs(scenarios, config)
+    personnel_lists: Dict[str, List[str]] = {}
+    for scenario_config in scenario_configs:
+        path: str = scenario_config['input_personnel_list_path']
+        if path not in personnel_lists:
+            personnel_lists[path] = get_personnel_list(path)
+    scenario_personnel: List[List[str]] = [
+        personnel_lists[x['input_personnel_list_path']]
+        for x in scenario_configs]
+    order: List[int] = sorted(
+        range(len(scenario_configs)), key=lambda i: get_baseline_key(
+            scenario_configs[i], scenario_personnel[i]))
+
+    output_paths: List[str]
+    if config['workers'] > 1 and len(scenario_configs) > 1:
+        # functions in config, e.g. 'special_field_funcs', can't be pickled
+        worker_configs: List[Dict[str, Any]] = [
+            {k: v for k, v in scenario_configs[i].items()
+             if k != 'special_field_funcs'} for i in order]
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=config['workers']) as executor:
+            output_paths = list(executor.map(
+                _save_scenario_in_worker,
+                worker_configs,
+                [scenario_personnel[i] for i in order]))
+    else:
+        output_paths = [
+            save_scenario(scenario_configs[i], scenario_personnel[i])
+            for i in order]
+    _shard_baselines.clear()
+
+    paths_by_scenario: Dict[int, str] = dict(zip(order, output_paths))
+
+    return [paths_by_scenario[i] for i in range(len(scenario_configs))]
+
+
+def run(config: Dict = CONFIG):
+    """Run the module.
+
+    Args:
+        config (dict): Dictionary containing configuration options.
+    """
+    for output_path in generate_scenarios(
+            load_scenarios(config['scenarios_file_path']), config):
+        print('Saved to: ' + output_path)
+
+
+def main(argv: List[str] = None):
+    """Command line entry point
+
+    Args:
+        argv (list): Command line arguments. Defaults to sys.argv.
+    """
+    parser: argparse.ArgumentParser = get_parser(
+        'Create variants of the PMA TCB Personnel dataset, each with its own '
+        'options, sharing baselines where they can', CONFIG)
+    parser.add_argument(
+        '--scenarios', dest='scenarios_file_path', metavar='PATH',
+        default=CONFIG['scenarios_file_path'],
+        help='Path to JSON list of scenarios, each an object of options '
+             'overriding those given here (default: %(default)s)')
+    args: argparse.Namespace = parse_args(parser, argv)
+    if args.incremental:
+        parser.error('--incremental does not apply to scenarios')
+    run_profiled(run, args, {**CONFIG, **vars(args)})
+
+
+if __name__ == '__main__':
+    main()
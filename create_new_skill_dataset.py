@@ -1,8 +1,90 @@
 """Create new PMA TCB skill dataset
 
-TODO: This is not yet implemented. However, it should be fast to implement
- by altering the "run" function of the "create_new_tidy_dataset" module
- to take another boolean param, where based on the param value, instead of
- saving a CSV, the run function will instead return the result. Then, the
- result can be piped to the "tidy_to_skill" module.
+Generates a mock tidy dataset as a compact TidyTable, and passes it straight
+to `tidy_to_skill.transform`, without saving and re-loading intermediate
+CSVs.
+
+Usage:
+    `python create_new_skill_dataset.py --help`
 """
+from typing import Any, Dict, List
+
+from create_new_personnel_dataset import get_parser, parse_args
+from create_new_tidy_dataset import CONFIG as TIDY_CONFIG, \
+    generate_tidy_table
+from instrumentation import run_profiled, stage
+from tidy_table import TidyTable
+from tidy_to_skill import CONFIG as SKILL_CONFIG, \
+    add_scorer_skills_argument, transform
+from utils import save_dataset
+
+
+CONFIG: Dict[str, Any] = {
+    **TIDY_CONFIG,
+    'include_scorer_skills': SKILL_CONFIG['include_scorer_skills'],
+    'output_sheet_name': SKILL_CONFIG['output_sheet_name'],
+}
+
+
+def generate_skill_dataset(
+    config: Dict[str, Any] = CONFIG,
+    personnel: List[str] = None,
+) -> List[List[Any]]:
+    """Generate mock skill dataset
+
+    Args:
+        config (dict): Dictionary containing configuration options.
+        personnel (list): List of personnel to generate data for. If not
+        passed, read from config['input_personnel_list_path'].
+
+    Returns:
+        list: Skill dataset, including header
+    """
+    # normalized, so capacities are encoded once rather than once per scorer
+    tidy_table: TidyTable = \
+        generate_tidy_table({**config, 'normalized': True}, personnel)
+
+    with stage('transform') as record:
+        transformed: List[List[Any]] = transform(
+            source=tidy_table,
+            include_scorer_skills=config['include_scorer_skills'],)
+        record.rows += len(transformed) - 1
+
+    return transformed
+
+
+def run(config: Dict = CONFIG):
+    """Run the module.
+
+    Args:
+        config (dict): Dictionary containing configuration options.
+    """
+    dataset: List[List[Any]] = generate_skill_dataset(config)
+    if not config['include_header']:
+        dataset = dataset[1:]
+    with stage('save'):
+        output_path: str = save_dataset(
+            array=dataset,
+            path=config['output_file_path'],
+            output_format=config['output_format'],
+            compression=config['output_compression'],
+            sheet_name=config['output_sheet_name'],
+            partition_by=config['output_partition_by'],
+            rows_per_part=config['output_rows_per_part'])
+    print('Saved to: ' + output_path)
+
+
+def main(argv: List[str] = None):
+    """Command line entry point
+
+    Args:
+        argv (list): Command line arguments. Defaults to sys.argv.
+    """
+    parser = get_parser('Create new PMA TCB skill dataset', CONFIG)
+    add_scorer_skills_argument(parser, CONFIG)
+    args = parse_args(parser, argv)
+    run_profiled(run, args, {**CONFIG, **vars(args)})
+
+
+if __name__ == '__main__':
+    main()
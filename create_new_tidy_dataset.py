@@ -1,8 +1,111 @@
 """Create new PMA TCB tidy dataset
 
-TODO: This is not yet implemented. However, it should be fast to implement
- by altering the "run" function of the "create_new_personnel_dataset" module
- to take another boolean param, where based on the param value, instead of
- saving a CSV, the run function will instead return the result. Then, the
- result can be piped to the "personnel_to_tidy" module.
+Generates a mock personnel dataset and pipes its rows straight through
+`personnel_to_tidy.tidy_up`, without saving and re-loading a personnel CSV.
+
+Usage:
+    `python create_new_tidy_dataset.py --help`
 """
+from itertools import chain, islice
+from typing import Any, Dict, Iterator, List
+
+from create_new_personnel_dataset import CONFIG as PERSONNEL_CONFIG, \
+    HEADER as PERSONNEL_HEADER, generate_dataset, get_parser, parse_args
+from instrumentation import iter_stage, run_profiled, stage
+from personnel_to_tidy import CONFIG as TIDY_CONFIG, \
+    add_normalized_argument, tidy_up, tidy_up_table
+from tidy_table import TidyTable
+from utils import save_dataset
+
+
+CONFIG: Dict[str, Any] = {
+    **PERSONNEL_CONFIG,
+    'output_sheet_name': 'data',
+    'normalized': TIDY_CONFIG['normalized'],
+}
+
+
+def generate_tidy_dataset(
+    config: Dict[str, Any] = CONFIG,
+    personnel: List[str] = None,
+) -> Iterator[List[Any]]:
+    """Generate mock tidy dataset
+
+    Args:
+        config (dict): Dictionary containing configuration options.
+        personnel (list): List of personnel to generate data for. If not
+        passed, read from config['input_personnel_list_path'].
+
+    Returns:
+        iter: Tidy dataset rows, including header
+    """
+    personnel_rows: Iterator[List[Any]] = chain(
+        [PERSONNEL_HEADER], generate_dataset(config, personnel))
+
+    # chunked rows are in shard order, so dates are not grouped
+    return iter_stage('tidy', tidy_up(
+        personnel_rows, dates_grouped=not config['chunked'],
+        normalized=config['normalized']))
+
+
+def generate_tidy_table(
+    config: Dict[str, Any] = CONFIG,
+    personnel: List[str] = None,
+) -> TidyTable:
+    """Generate mock tidy dataset as a compact, in-memory table
+
+    Args:
+        config (dict): Dictionary containing configuration options.
+        personnel (list): List of personnel to generate data for. If not
+        passed, read from config['input_personnel_list_path'].
+
+    Returns:
+        TidyTable: Tidy dataset
+    """
+    personnel_rows: Iterator[List[Any]] = chain(
+        [PERSONNEL_HEADER], generate_dataset(config, personnel))
+
+    with stage('tidy') as record:
+        table: TidyTable = tidy_up_table(
+            personnel_rows, dates_grouped=not config['chunked'],
+            normalized=config['normalized'])
+        record.rows += len(table)
+
+    return table
+
+
+def run(config: Dict = CONFIG):
+    """Run the module.
+
+    Args:
+        config (dict): Dictionary containing configuration options.
+    """
+    dataset: Iterator[List[Any]] = generate_tidy_dataset(config)
+    if not config['include_header']:
+        dataset = islice(dataset, 1, None)
+    with stage('save'):
+        output_path: str = save_dataset(
+            array=dataset,
+            path=config['output_file_path'],
+            output_format=config['output_format'],
+            compression=config['output_compression'],
+            sheet_name=config['output_sheet_name'],
+            partition_by=config['output_partition_by'],
+            rows_per_part=config['output_rows_per_part'])
+    print('Saved to: ' + output_path)
+
+
+def main(argv: List[str] = None):
+    """Command line entry point
+
+    Args:
+        argv (list): Command line arguments. Defaults to sys.argv.
+    """
+    parser = get_parser('Create new PMA TCB tidy dataset', CONFIG)
+    add_normalized_argument(parser, CONFIG)
+    args = parse_args(parser, argv)
+    run_profiled(run, args, {**CONFIG, **vars(args)})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+"""Per-stage timers, row counters and peak memory, for profiling runs
+
+Stages are named phases of a run, e.g. 'baseline' or 'tidy'. Wrap a phase
+in `with stage(name):`, or a lazily produced stream of rows in
+`iter_stage(name, rows)`. Stage times exclude the time of stages nested in
+them, so when one stage consumes another's stream, as when saving streamed
+tidy rows, each is only charged for its own work. A stage entered more
+than once, e.g. once per shard or per timeslice, is summed.
+
+Instrumentation is off by default, and then costs one check per stage.
+Entry points enable it with `--profile`, or the TCB_PROFILE environment
+variable, e.g. TCB_PROFILE=1, or TCB_PROFILE=0 to leave it off. Library
+callers can run a module's `run` through `run_profiled` to do the same.
+With `--profile-memory`, peak traced Python memory is recorded per stage
+too, which slows the run down. Stages of worker processes, with
+more than one worker, are not recorded.
+
+Usage:
+    `with stage('baseline') as record: ...; record.rows += len(baseline)`
+"""
+import argparse
+import json
+import os
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils import import_optional
+
+PROFILE_ENV_VAR: str = 'TCB_PROFILE'
+PROFILE_MEMORY_ENV_VAR: str = 'TCB_PROFILE_MEMORY'
+PROFILE_JSON_ENV_VAR: str = 'TCB_PROFILE_JSON'
+CPROFILE_ENV_VAR: str = 'TCB_CPROFILE'
+CPROFILE_TOP_FUNCTIONS: int = 25
+# Profiling options, see `add_profile_arguments`, by environment variable
+PROFILE_FLAG_ENV_VARS: Dict[str, str] = {
+    'profile': PROFILE_ENV_VAR, 'profile_memory': PROFILE_MEMORY_ENV_VAR}
+PROFILE_PATH_ENV_VARS: Dict[str, str] = {
+    'profile_json': PROFILE_JSON_ENV_VAR, 'cprofile': CPROFILE_ENV_VAR}
+ENV_TRUE_VALUES: List[str] = ['1', 'true', 'yes', 'on']
+ENV_FALSE_VALUES: List[str] = ['', '0', 'false', 'no', 'off']
+
+
+class StageRecord:
+    """Totals of a stage, over every time it was entered
+
+    Attributes:
+        name (str): Stage name
+        calls (int): Times entered
+        seconds (float): Seconds spent in stage, not including nested stages
+        rows (int): Rows produced
+        max_rss_bytes (int): Peak resident set size of the process, as of
+        leaving the stage
+        peak_bytes (int): Peak traced Python memory while in stage, if memory
+        is traced
+    """
+
+    def __init__(self, name: str):
+        """Create empty record
+
+        Args:
+            name (str): Stage name
+        """
+        self.name: str = name
+        self.calls: int = 0
+        self.seconds: float = 0.0
+        self.rows: int = 0
+        self.max_rss_bytes: int = 0
+        self.peak_bytes: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get record as a dict
+
+        Returns:
+            dict: Attributes by name
+        """
+        return {'name': self.name, 'calls': self.calls,
+                'seconds': self.seconds, 'rows': self.rows,
+                'max_rss_bytes': self.max_rss_bytes,
+                'peak_bytes': self.peak_bytes}
+
+
+class _Frame:
+    """An entered stage: its record, and totals of stages nested in it"""
+    __slots__ = ('record', 'start', 'nested_seconds', 'peak_bytes')
+
+    def __init__(self, record: StageRecord):
+        self.record: StageRecord = record
+        self.start: float = perf_counter()
+        self.nested_seconds: float = 0.0
+        self.peak_bytes: int = 0
+
+
+_enabled: bool = False
+_tracing_memory: bool = False
+_records: Dict[str, StageRecord] = {}
+_frames: List[_Frame] = []
+
+
+def get_max_rss() -> int:
+    """Get peak resident set size of the process so far
+
+    Returns:
+        int: Bytes, or 0 if not available on this platform
+    """
+    resource = import_optional('resource')
+    if resource is None:
+        return 0
+    max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def is_enabled() -> bool:
+    """Is instrumentation enabled?
+
+    Returns:
+        bool: Enabled
+    """
+    return _enabled
+
+
+def enable(trace_memory: bool = False):
+    """Enable instrumentation, clearing any previous records
+
+    Args:
+        trace_memory (bool): Record peak traced Python memory per stage?
+        Starts tracemalloc.
+    """
+    global _enabled, _tracing_memory
+    _enabled = True
+    _tracing_memory = trace_memory
+    _records.clear()
+    del _frames[:]
+    if trace_memory:
+        # imported here, like cProfile and pstats, to keep startup fast
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def disable():
+    """Disable instrumentation, and stop tracing memory"""
+    global _enabled, _tracing_memory
+    _enabled = False
+    if _tracing_memory:
+        import tracemalloc
+        tracemalloc.stop()
+    _tracing_memory = False
+
+
+def get_records() -> List[StageRecord]:
+    """Get stage records
+
+    Returns:
+        list: Records, in order of first entry
+    """
+    return list(_records.values())
+
+
+def _enter(name: str) -> _Frame:
+    record: StageRecord = _records.get(name)
+    if record is None:
+        record = _records[name] = StageRecord(name)
+    if _tracing_memory:
+        import tracemalloc
+        if _frames:  # keep the enclosing stage's peak, before resetting it
+            _frames[-1].peak_bytes = max(
+                _frames[-1].peak_bytes, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    frame = _Frame(record)
+    _frames.append(frame)
+
+    return frame
+
+
+def _exit(frame: _Frame, end_of_call: bool = True):
+    seconds: float = perf_counter() - frame.start
+    _frames.pop()
+    record: StageRecord = frame.record
+    if end_of_call:
+        record.calls += 1
+    record.seconds += seconds - frame.nested_seconds
+    if _frames:
+        _frames[-1].nested_seconds += seconds
+    if _tracing_memory:
+        import tracemalloc
+        peak_bytes: int = \
+            max(frame.peak_bytes, tracemalloc.get_traced_memory()[1])
+        record.peak_bytes = max(record.peak_bytes or 0, peak_bytes)
+        if _frames:
+            _frames[-1].peak_bytes = max(_frames[-1].peak_bytes, peak_bytes)
+    if end_of_call:
+        record.max_rss_bytes = get_max_rss()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[StageRecord]:
+    """Record a stage of a run
+
+    Args:
+        name (str): Stage name
+
+    Returns:
+        StageRecord: Record to add rows to. If not enabled, a record which is
+        not kept.
+    """
+    if not _enabled:
+        yield StageRecord(name)
+        return
+    frame: _Frame = _enter(name)
+    try:
+        yield frame.record
+    finally:
+        _exit(frame)
+
+
+def iter_stage(name: str, rows: Iterable[Any]) -> Iterable[Any]:
+    """Record producing a stream of rows as a stage
+
+    Only time spent producing rows is recorded, and each row is counted.
+    The stream counts as one call. Adds about a microsecond per row, so wrap
+    streams of rows rather than of cells.
+
+    Args:
+        name (str): Stage name
+        rows (iter): Rows
+
+    Returns:
+        iter: Same rows, or the passed iterable itself if not enabled
+    """
+    if not _enabled:
+        return rows
+
+    return _iter_stage(name, rows)
+
+
+def _iter_stage(name: str, rows: Iterable[Any]) -> Iterator[Any]:
+    iterator: Iterator[Any] = iter(rows)
+    while True:
+        frame: _Frame = _enter(name)
+        try:
+            row: Any = next(iterator)
+        except StopIteration:
+            _exit(frame)
+            return
+        except BaseException:
+            _exit(frame)
+            raise
+        _exit(frame, end_of_call=False)
+        frame.record.rows += 1
+        yield row
+
+
+def summary(total_seconds: float = None) -> str:
+    """Get stage records as a table
+
+    Args:
+        total_seconds (float): Wall time of the run, to show each stage's
+        share of it
+
+    Returns:
+        str: Table
+    """
+    records: List[StageRecord] = get_records()
+    show_peak: bool = any(x.peak_bytes is not None for x in records)
+    row_format: str = '{:<20} {:>7} {:>10} {:>7} {:>12} {:>12} {:>11}' \
+        + (' {:>9}' if show_peak else '')
+    columns: List[str] = [
+        'stage', 'calls', 'seconds', '%', 'rows', 'rows/s', 'max RSS MB']
+    lines: List[str] = [row_format.format(
+        *columns + (['peak MB'] if show_peak else []))]
+    for record in records:
+        values: List[str] = [
+            record.name, str(record.calls), '{:.3f}'.format(record.seconds),
+            '{:.1f}'.format(100 * record.seconds / total_seconds)
+            if total_seconds else '',
+            '{:,}'.format(record.rows) if record.rows else '',
+            '{:,.0f}'.format(record.rows / record.seconds)
+            if record.rows and record.seconds else '',
+            '{:.1f}'.format(record.max_rss_bytes / 1e6)]
+        if show_peak:
+            values.append('{:.1f}'.format(record.peak_bytes / 1e6)
+                          if record.peak_bytes is not None else '')
+        lines.append(row_format.format(*values))
+    if total_seconds is not None:
+        lines.append('total: {:.3f}s'.format(total_seconds))
+
+    return '\n'.join(lines)
+
+
+def save_json(path: str, total_seconds: float = None):
+    """Save stage records as JSON
+
+    Args:
+        path (str): Path to save JSON file
+        total_seconds (float): Wall time of the run
+
+    Side effects:
+        - Saves JSON file
+    """
+    with open(path, 'w') as f:
+        json.dump({'total_seconds': total_seconds,
+                   'stages': [x.to_dict() for x in get_records()]},
+                  f, indent=2)
+
+
+def get_env_flag(name: str) -> bool:
+    """Read an on or off environment variable
+
+    Args:
+        name (str): Environment variable
+
+    Raises:
+        ValueError: If set to neither one of ENV_TRUE_VALUES nor one of
+        ENV_FALSE_VALUES, in any case
+
+    Returns:
+        bool: On? Off if not set.
+    """
+    value: str = os.environ.get(name, '').strip().lower()
+    if value not in ENV_TRUE_VALUES and value not in ENV_FALSE_VALUES:
+        raise ValueError('{} must be one of: {}'.format(
+            name, ', '.join(ENV_TRUE_VALUES + ENV_FALSE_VALUES[1:])))
+
+    return value in ENV_TRUE_VALUES
+
+
+def get_env_profile_options(
+    args: Optional[argparse.Namespace] = None,
+) -> argparse.Namespace:
+    """Get profiling options, from their environment variables where not
+    given on the command line
+
+    An invalid on or off value, e.g. TCB_PROFILE=maybe, is reported as a
+    warning and leaves its option off, rather than stopping the run.
+
+    Args:
+        args (argparse.Namespace): Parsed options, see
+        `add_profile_arguments`. Options which are None are read from the
+        environment. Defaults to reading every option from it.
+
+    Side effects:
+        - Prints a warning to stderr for each invalid on or off value
+
+    Returns:
+        argparse.Namespace: Options
+    """
+    options: Dict[str, Any] = {}
+    for option, name in PROFILE_FLAG_ENV_VARS.items():
+        options[option] = getattr(args, option, None)
+        if options[option] is None:
+            try:
+                options[option] = get_env_flag(name)
+            except ValueError as e:
+                print('Warning: {}. Leaving --{} off.'.format(
+                    e, option.replace('_', '-')), file=sys.stderr)
+                options[option] = False
+    for option, name in PROFILE_PATH_ENV_VARS.items():
+        options[option] = getattr(args, option, None)
+        if options[option] is None:
+            options[option] = os.environ.get(name) or None
+
+    return argparse.Namespace(**options)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """Add profiling options to a command line parser
+
+    Options not given are None, and default to their environment
+    variable, e.g. TCB_PROFILE=1, when the run starts, see
+    `get_env_profile_options`. So an invalid value does not stop the
+    parser, e.g. for `--help`.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+    """
+    group = parser.add_argument_group('profiling')
+    group.add_argument(
+        '--profile', action='store_true',
+        default=None,
+        help='Print time, rows and memory of each stage of the run '
+             '(env: {})'.format(PROFILE_ENV_VAR))
+    group.add_argument(
+        '--profile-memory', action='store_true',
+        default=None,
+        help='Also trace peak Python memory of each stage. Slower. Implies '
+             '--profile (env: {})'.format(PROFILE_MEMORY_ENV_VAR))
+    group.add_argument(
+        '--profile-json', metavar='PATH',
+        default=None,
+        help='Also save stages as JSON. Implies --profile '
+             '(env: {})'.format(PROFILE_JSON_ENV_VAR))
+    group.add_argument(
+        '--cprofile', metavar='PATH',
+        default=None,
+        help='Run under cProfile, save its stats, and print the slowest '
+             'functions (env: {})'.format(CPROFILE_ENV_VAR))
+
+
+def run_profiled(
+    func: Callable,
+    args: Optional[argparse.Namespace],
+    *func_args,
+) -> Any:
+    """Call an entry point's run function, profiled as per its options
+
+    Library callers can pass no options, e.g.
+    `run_profiled(run, None, config)`, to profile as per the environment.
+
+    Args:
+        func (func): Function to call
+        args (argparse.Namespace): Parsed options, see
+        `add_profile_arguments`, or None to read them all from the
+        environment
+        *func_args: Arguments to call function with
+
+    Side effects:
+        - Prints a stage summary, and saves JSON and cProfile stats, if so
+        configured
+
+    Returns:
+        Return value of function
+    """
+    args = get_env_profile_options(args)
+    profile: bool = args.profile or args.profile_memory \
+        or bool(args.profile_json)
+    if not profile and not args.cprofile:
+        return func(*func_args)
+
+    if profile:
+        enable(trace_memory=args.profile_memory)
+    profiler: Any = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+    start: float = perf_counter()
+    try:
+        if profiler is not None:
+            return profiler.runcall(func, *func_args)
+        return func(*func_args)
+    finally:
+        total_seconds: float = perf_counter() - start
+        if profile:
+            print(summary(total_seconds))
+            if args.profile_json:
+                save_json(args.profile_json, total_seconds)
+                print('Saved profile to: ' + args.profile_json)
+            disable()
+        if profiler is not None:
+            import pstats
+            profiler.dump_stats(args.cprofile)
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(
+                CPROFILE_TOP_FUNCTIONS)
+            print('Saved cProfile stats to: ' + args.cprofile)
@@ -1,15 +1,179 @@
-"""Convert tidy data format to data by skill"""
-from typing import Any, List
+"""Convert personnel data format to data by skill
 
-from personnel_to_tidy import run as load
-from tidy_to_skill import run as pipe
+Reads only the Date, Person and capacity columns of each wide row, and emits
+one skill row per (Skill, Date, Person), without expanding rows into the tidy
+format first.
+"""
+import argparse
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, \
+    Tuple
 
+from config import SKILLS
+from instrumentation import add_profile_arguments, iter_stage, \
+    run_profiled, stage
+from personnel_to_tidy import CONFIG as TIDY_CONFIG, \
+    add_input_date_format_argument, load_cache, parse_date, run as load
+from schema import Schema, get_schema
+from tidy_to_skill import CONFIG as SKILL_CONFIG, HEADER, \
+    add_scorer_skills_argument, run as pipe
+from utils import add_input_sheet_argument, add_output_arguments, \
+    add_prefetch_argument, iter_dataset, save_dataset
+from wide_cache import WideCache, add_cache_arguments
 
-def run():
-    """Run the module"""
-    dataset: List[List[Any]] = load(save=False)
-    pipe(dataset=dataset)
+
+CONFIG: Dict[str, Any] = {
+    'input_file_path': TIDY_CONFIG['input_file_path'],
+    'output_file_path': SKILL_CONFIG['output_file_path'],
+    'output_format': SKILL_CONFIG['output_format'],
+    'output_compression': SKILL_CONFIG['output_compression'],
+    'output_partition_by': SKILL_CONFIG['output_partition_by'],
+    'output_rows_per_part': SKILL_CONFIG['output_rows_per_part'],
+    'input_sheet_name': TIDY_CONFIG['input_sheet_name'],
+    'input_prefetch': TIDY_CONFIG['input_prefetch'],
+    'input_cache': TIDY_CONFIG['input_cache'],
+    'input_cache_dir': TIDY_CONFIG['input_cache_dir'],
+    'output_sheet_name': SKILL_CONFIG['output_sheet_name'],
+    'input_date_format': TIDY_CONFIG['input_date_format'],
+    'include_scorer_skills': SKILL_CONFIG['include_scorer_skills'],
+}
+
+
+def get_source_fields(header: List[str]) -> List[str]:
+    """Get the fields of a wide dataset which `transform` reads
+
+    Args:
+        header (list): Header of wide dataset
+
+    Returns:
+        list: Date, Person, and capacity fields
+    """
+    schema: Schema = get_schema(header)
+
+    return ['Date', 'Person'] + [
+        header[x] for field_type in ('current_capacity', 'targeted_capacity')
+        for x in schema.indices_by_field_type[field_type]]
+
+
+def transform(
+    source: Iterable[List[str]],
+    date_format: str = CONFIG['input_date_format'],
+) -> List[List[Any]]:
+    """Transform wide personnel dataset directly to skill dataset
+
+    Capacities are the same across scorer rows of a person and date, so only
+    the first row of each (Date, Person) is read, like the first tidy row is
+    kept by `tidy_to_skill.transform`.
+
+    Args:
+        source (iter): Source wide dataset of raw strings, including header,
+        e.g. rows of a loaded CSV.
+        date_format (str): Format of dates in source
+
+    Returns:
+        list: Skill dataset, including header
+    """
+    source_rows: Iterator[List[str]] = iter(source)
+    source_schema: Schema = get_schema(next(source_rows))
+    date_idx, person_idx = source_schema.indices('Date', 'Person')
+    capacity_indices: List[Tuple[str, int, int]] = [
+        (skill,
+         source_schema.skill_field_index[(skill, 'current_capacity')],
+         source_schema.skill_field_index[(skill, 'targeted_capacity')])
+        for skill in SKILLS]
+
+    header_schema: Schema = get_schema(HEADER)
+    skill_idx, out_date_idx, out_person_idx, current_out_idx, \
+        targeted_out_idx = header_schema.indices(
+            'Skill', 'Date', 'Person', 'Current Capacity',
+            'Targeted Capacity')
+    dates: Dict[str, date] = {}
+    seen: Set[Tuple[str, str]] = set()
+    transformed: List[List[Any]] = []
+    for row in source_rows:
+        date_str: str = row[date_idx]
+        person: str = row[person_idx]
+        if (date_str, person) in seen:
+            continue
+        seen.add((date_str, person))
+        if date_str not in dates:
+            dates[date_str] = parse_date(date_str, date_format)
+        row_date: date = dates[date_str]
+
+        for skill, current_idx, targeted_idx in capacity_indices:
+            current: str = row[current_idx]
+            targeted: str = row[targeted_idx]
+            new_row: List[Any] = [None] * len(HEADER)
+            new_row[skill_idx] = skill
+            new_row[out_date_idx] = row_date
+            new_row[out_person_idx] = person
+            new_row[current_out_idx] = int(current) if current else ''
+            new_row[targeted_out_idx] = int(targeted) if targeted else ''
+            transformed.append(new_row)
+
+    transformed.sort(key=header_schema.getter('Skill', 'Date', 'Person'))
+
+    return [HEADER] + transformed
+
+
+def run(config: Dict = CONFIG):
+    """Run the module
+
+    Args:
+        config (dict): Dictionary containing configuration options.
+    """
+    if config['include_scorer_skills']:
+        dataset: Iterator[List[Any]] = load(
+            config={**TIDY_CONFIG, **config, 'normalized': True}, save=False)
+        pipe(dataset=dataset, config={**SKILL_CONFIG, **config})
+        return
+
+    cache: Optional[WideCache] = load_cache(config)
+    source: Iterable[List[str]] = \
+        cache.iter_rows(fields=get_source_fields(cache.header)) \
+        if cache is not None else iter_dataset(
+            config['input_file_path'], config['input_sheet_name'],
+            config['input_date_format'], config['input_prefetch'])
+    with stage('transform') as record:
+        transformed: List[List[Any]] = transform(
+            source=iter_stage('load', source),
+            date_format=config['input_date_format'],)
+        record.rows += len(transformed) - 1
+    with stage('save'):
+        output_path: str = save_dataset(
+            array=transformed,
+            path=config['output_file_path'],
+            output_format=config['output_format'],
+            compression=config['output_compression'],
+            sheet_name=config['output_sheet_name'],
+            partition_by=config['output_partition_by'],
+            rows_per_part=config['output_rows_per_part'])
+    print('Saved to: ' + output_path)
+
+
+def main(argv: List[str] = None):
+    """Command line entry point
+
+    Args:
+        argv (list): Command line arguments. Defaults to sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        description='Convert personnel dataset to skill dataset')
+    parser.add_argument(
+        '-i', '--input', dest='input_file_path', metavar='PATH',
+        default=CONFIG['input_file_path'],
+        help='Path to personnel dataset CSV, Excel workbook, or partitioned '
+             'dataset directory (default: %(default)s)')
+    add_input_sheet_argument(parser, CONFIG)
+    add_input_date_format_argument(parser, CONFIG)
+    add_prefetch_argument(parser, CONFIG)
+    add_cache_arguments(parser, CONFIG)
+    add_scorer_skills_argument(parser, CONFIG)
+    add_output_arguments(parser, CONFIG)
+    add_profile_arguments(parser)
+    args: argparse.Namespace = parser.parse_args(argv)
+    run_profiled(run, args, {**CONFIG, **vars(args)})
 
 
 if __name__ == '__main__':
-    run()
+    main()
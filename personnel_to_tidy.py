@@ -1,10 +1,25 @@
 """Personnel dataset to tidy dataset"""
+import argparse
+import os
 from copy import copy
 from datetime import date, datetime
-from typing import Dict, Any, List, Union
+from itertools import chain, groupby
+from operator import itemgetter
+from typing import Callable, Dict, Any, FrozenSet, Iterable, \
+    Iterator, List, NamedTuple, Optional, Tuple, Union
 
-from config import SKILL_DATA_FIELDS, NO_SCORER_SKILL_FIELDS
-from utils import save_csv, load_csv
+from config import SKILL_DATA_FIELDS, SKILL_FIELD_REPEATS, SKILLS, \
+    NO_SCORER_SKILL_FIELDS
+from schema import SKILL_FIELD_PARTS, Schema, get_schema, \
+    indices_to_slice
+from instrumentation import add_profile_arguments, iter_stage, \
+    run_profiled, stage
+from tidy_table import TidyTable
+from utils import PARTITION_ROWS_PER_PART, add_input_sheet_argument, \
+    add_output_arguments, add_prefetch_argument, import_optional, \
+    iter_dataset, save_dataset
+from wide_cache import CACHE_DIR, WideCache, add_cache_arguments, \
+    load_wide_cache
 
 
 HEADER: List[str] = \
@@ -12,104 +27,579 @@ HEADER: List[str] = \
 CONFIG: Dict[str, Any] = {
     'input_file_path': './input.csv',
     'output_file_path': './output.csv',
+    'output_format': 'csv',
+    'output_compression': 'none',
+    'output_partition_by': None,
+    'output_rows_per_part': PARTITION_ROWS_PER_PART,
+    'input_sheet_name': 'data',
+    'input_prefetch': False,
+    'input_cache': False,
+    'input_cache_dir': CACHE_DIR,
+    'output_sheet_name': 'data',
     'input_date_format': '%m/%d/%y',
+    # only emit tidy rows of these skills, skill fields, scorers and
+    # persons, and of dates in this inclusive range; None for all
+    'filter_skills': None,
+    'filter_fields': None,
+    'filter_scorers': None,
+    'filter_persons': None,
+    'filter_start_date': None,
+    'filter_end_date': None,
+    # emit capacities once per (Date, Person, Skill), not once per scorer
+    'normalized': False,
 }
 
 
+class TidyFilter(NamedTuple):
+    """Selection of tidy rows, applied before wide rows are expanded
+
+    Attributes:
+        skills (frozenset): Skills to keep, e.g. 'A1', or None for all
+        fields (frozenset): Skill field types to keep, e.g. 'score', or None
+        for all
+        scorers (frozenset): Scorers to keep, or None for all. Tidy rows
+        without a scorer, e.g. capacities, are not kept when set.
+        persons (frozenset): Persons to keep, or None for all
+        start_date (date): First date to keep, or None
+        end_date (date): Last date to keep, or None
+    """
+    skills: Optional[FrozenSet[str]] = None
+    fields: Optional[FrozenSet[str]] = None
+    scorers: Optional[FrozenSet[str]] = None
+    persons: Optional[FrozenSet[str]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+
+class ParseCache(dict):
+    """Parsed values by raw string, each parsed on first use
+
+    A wide dataset repeats a handful of distinct dates and scores in every
+    row, so a lookup is much cheaper than parsing every cell.
+    """
+
+    def __init__(self, parse: Callable[[str], Any]):
+        """Create empty cache
+
+        Args:
+            parse (func): Raw string to value function
+        """
+        super().__init__()
+        self.parse: Callable[[str], Any] = parse
+
+    def __missing__(self, raw: str) -> Any:
+        value: Any = self.parse(raw)
+        self[raw] = value
+
+        return value
+
+
+def parse_date(raw: str, date_format: str) -> date:
+    """Parse a date of the source dataset
+
+    Falls back to ISO 8601 dates, as written by the dataset generators, if
+    `raw` does not match `date_format`, so generated datasets can be
+    converted without passing their date format.
+
+    Args:
+        raw (str): Date string
+        date_format (str): Format of dates in source, for `strptime`
+
+    Returns:
+        date: Parsed date
+
+    Raises:
+        ValueError: If `raw` matches neither `date_format` nor ISO 8601
+    """
+    try:
+        return datetime.strptime(raw, date_format).date()
+    except ValueError:
+        try:
+            return date.fromisoformat(raw)
+        except ValueError:
+            pass
+        raise
+
+
+def get_converters(
+    source_schema: Schema,
+    date_format: str = CONFIG['input_date_format'],
+) -> Tuple[List[Tuple[int, Callable]], List[Tuple[slice, Callable]]]:
+    """Get the converter table to format each row of a raw wide dataset
+
+    Dates are parsed with `parse_date`. Skill data fields, apart from notes,
+    are parsed as integers, or None if blank. Columns of one skill field type
+    are converted with one slice per row where possible.
+
+    Args:
+        source_schema (Schema): Column plan of the source wide dataset
+        date_format (str): Format of dates in source
+
+    Returns:
+        tuple: List of (column index, converter) and list of (column slice,
+        converter), where converter is a raw string to value function
+    """
+    dates = ParseCache(lambda x: parse_date(x, date_format))
+    ints = ParseCache(lambda x: int(x) if x else None)
+    cell_converters: List[Tuple[int, Callable]] = \
+        [(source_schema.index['Date'], dates.__getitem__)]
+    slice_converters: List[Tuple[slice, Callable]] = []
+    for field_type, indices in source_schema.indices_by_field_type.items():
+        if field_type == 'notes' or not indices:
+            continue
+        field_slice: Optional[slice] = indices_to_slice(indices)
+        if field_slice is None:
+            cell_converters.extend((idx, ints.__getitem__) for idx in indices)
+        else:
+            slice_converters.append((field_slice, ints.__getitem__))
+
+    return cell_converters, slice_converters
+
+
+def iter_formatted_csv(
+    source: Iterable[List[str]],
+    date_format: str = CONFIG['input_date_format'],
+) -> Iterator[List[Union[str, int, date]]]:
+    """Format raw wide CSV rows into proper data types, in one pass
+
+    Rows are formatted as they are read, so a CSV can be streamed from
+    `csv.reader` without loading it first. Source rows are not modified.
+
+    Args:
+        source (iter): Rows of raw strings, including header
+        date_format (str): Format of dates in source
+
+    Returns:
+        iter: Rows with strings formatted to correct data types, including
+        header
+    """
+    source_rows: Iterator[List[str]] = iter(source)
+    source_header: List[str] = next(source_rows)
+    cell_converters, slice_converters = \
+        get_converters(get_schema(source_header), date_format)
+    yield source_header
+    for row in source_rows:
+        new_row: List[Any] = list(row)
+        for idx, convert in cell_converters:
+            new_row[idx] = convert(new_row[idx])
+        for field_slice, convert in slice_converters:
+            new_row[field_slice] = map(convert, new_row[field_slice])
+        yield new_row
+
+
 def format_loaded_csv(
     source: List[List[str]],
+    date_format: str = CONFIG['input_date_format'],
 ) -> List[List[Union[str, int, date]]]:
     """Format a loaded CSV 2d array of raw strings into proper data types
 
     Args:
         source (list): 2d array of strings from a previously loaded CSV
+        date_format (str): Format of dates in source
 
     Returns:
         list: 2d array with strings formatted to correct data types
     """
-    source_header: List[str] = source[0]
-
-    # format dates
-    date_formatted: List[List[Union[str, date]]] = [source_header, ]
-    date_field_indices: List[int] = [source_header.index('Date'), ]
-    for row in source[1:]:
-        new_row: List[Union[str, date]] = copy(row)
-        for idx in date_field_indices:
-            date_format: str = CONFIG['input_date_format']
-            new_row[idx]: date = \
-                datetime.strptime(new_row[idx], date_format).date()
-        date_formatted.append(new_row)
-
-    # format integers
-    all_formatted: List[List[Union[str, int, date]]] = [source_header, ]
-    integer_field_indices: List[int] = [
-        source_header.index(x)
-        for x in SKILL_DATA_FIELDS
-        if not x.endswith('notes')]
-    for row in date_formatted[1:]:
-        new_row: List[Union[str, int, date]] = copy(row)
-        for idx in integer_field_indices:
-            new_row[idx]: int = int(new_row[idx]) if new_row[idx] else None
-        all_formatted.append(new_row)
-
-    return all_formatted
+    return list(iter_formatted_csv(source, date_format))
+
+
+def iter_formatted_cache(
+    cache: WideCache,
+    date_format: str = CONFIG['input_date_format'],
+) -> Iterator[List[Union[str, int, date]]]:
+    """Format rows of a cached wide dataset into proper data types
+
+    Same rows as `iter_formatted_csv`, but each distinct string is converted
+    once, and rows are decoded and formatted by array indexing.
+
+    Args:
+        cache (WideCache): Cached wide dataset of raw strings
+        date_format (str): Format of dates in source
+
+    Returns:
+        iter: Rows with strings formatted to correct data types, including
+        header
+    """
+    cell_converters, slice_converters = \
+        get_converters(get_schema(cache.header), date_format)
+    converters: Dict[int, Callable] = dict(cell_converters)
+    column_indices: range = range(len(cache.header))
+    for field_slice, convert in slice_converters:
+        converters.update((x, convert) for x in column_indices[field_slice])
+
+    return cache.iter_rows(converters)
+
+
+def load_cache(config: Dict[str, Any] = CONFIG) -> Optional[WideCache]:
+    """Load the cache of the input file, if so configured
+
+    Args:
+        config (dict): Dictionary containing configuration options.
+
+    Side effects:
+        - Saves cache files, if the cache is missing or out of date
+
+    Returns:
+        WideCache: Cache, or None if not configured, or input cannot be
+        cached
+    """
+    if not config['input_cache'] or os.path.isdir(config['input_file_path']):
+        return None
+    if import_optional('numpy') is None:
+        print('NumPy is not installed. Reading input without a cache.')
+        return None
+    with stage('load'):
+        return load_wide_cache(
+            path=config['input_file_path'],
+            cache_dir=config['input_cache_dir'],
+            sheet_name=config['input_sheet_name'],
+            date_format=config['input_date_format'],
+            prefetch=config['input_prefetch'])
+
+
+def get_tidy_filter(config: Dict[str, Any] = CONFIG) -> Optional[TidyFilter]:
+    """Get the tidy row filter of a configuration
+
+    Args:
+        config (dict): Dictionary containing configuration options, with
+        'filter_*' options
+
+    Raises:
+        ValueError: If a skill or skill field is unknown
+
+    Returns:
+        TidyFilter: Filter, or None if nothing is filtered
+    """
+    selections: Dict[str, Optional[FrozenSet[str]]] = {
+        x: None if config['filter_' + x] is None
+        else frozenset(config['filter_' + x])
+        for x in ('skills', 'fields', 'scorers', 'persons')}
+    for name, known in (('skills', SKILLS), ('fields', SKILL_FIELD_REPEATS)):
+        unknown: List[str] = sorted((selections[name] or set()) - set(known))
+        if unknown:
+            raise ValueError('Unknown {} to filter by: {}'.format(
+                name, ', '.join(unknown)))
+    tidy_filter = TidyFilter(
+        start_date=config['filter_start_date'],
+        end_date=config['filter_end_date'],
+        **selections)
+
+    return tidy_filter if tidy_filter != TidyFilter() else None
+
+
+def get_row_predicate(
+    source_schema: Schema,
+    tidy_filter: Optional[TidyFilter],
+    parse_date: Callable[[Any], date] = None,
+) -> Optional[Callable[[List[Any]], bool]]:
+    """Get a function which tells whether a wide row passes a filter
+
+    Args:
+        source_schema (Schema): Column plan of the wide dataset
+        tidy_filter (TidyFilter): Filter. Only its scorers, persons and
+        dates apply to wide rows.
+        parse_date (func): Raw string to date function, if rows are not
+        formatted yet
+
+    Returns:
+        func: Row to bool function, or None if every row passes
+    """
+    if tidy_filter is None:
+        return None
+    date_idx, person_idx, scorer_idx = \
+        source_schema.indices('Date', 'Person', 'Scorer')
+    scorers, persons, start_date, end_date = (
+        tidy_filter.scorers, tidy_filter.persons, tidy_filter.start_date,
+        tidy_filter.end_date)
+    if scorers is None and persons is None and start_date is None \
+            and end_date is None:
+        return None
+
+    def predicate(row: List[Any]) -> bool:
+        if persons is not None and row[person_idx] not in persons:
+            return False
+        if scorers is not None and row[scorer_idx] not in scorers:
+            return False
+        if start_date is None and end_date is None:
+            return True
+        row_date: date = row[date_idx] if parse_date is None \
+            else parse_date(row[date_idx])
+        return (start_date is None or row_date >= start_date) \
+            and (end_date is None or row_date <= end_date)
+
+    return predicate
+
+
+def filter_wide_rows(
+    source: Iterable[List[Any]],
+    tidy_filter: Optional[TidyFilter],
+    date_format: str = None,
+) -> Iterator[List[Any]]:
+    """Drop wide rows which no tidy row of a filter would come from
+
+    Args:
+        source (iter): Wide dataset, including header
+        tidy_filter (TidyFilter): Filter, see `get_row_predicate`
+        date_format (str): Format of dates, if rows are raw strings rather
+        than formatted. Filtering raw rows saves formatting dropped ones.
+
+    Returns:
+        iter: Rows which pass, including header
+    """
+    source_rows: Iterator[List[Any]] = iter(source)
+    source_header: List[str] = next(source_rows)
+    parse_raw_date: Optional[Callable] = None
+    if date_format is not None:
+        parse_raw_date = ParseCache(
+            lambda x: parse_date(x, date_format)).__getitem__
+    predicate: Optional[Callable] = get_row_predicate(
+        get_schema(source_header), tidy_filter, parse_raw_date)
+    yield source_header
+    yield from source_rows if predicate is None \
+        else filter(predicate, source_rows)
+
+
+def get_tidy_plan(
+    source_schema: Schema,
+    tidy_filter: TidyFilter = None,
+    normalized: bool = False,
+) -> List[Tuple[int, str, str, bool]]:
+    """Get the per-cell plan to tidy up each row of a wide dataset
+
+    Args:
+        source_schema (Schema): Column plan of the source wide dataset
+        tidy_filter (TidyFilter): Filter, whose skills and fields are kept,
+        and whose scorers, if set, leave out fields with a blank Scorer.
+        Defaults to all.
+        normalized (bool): Plan for normalized output, see `tidy_up`?
+
+    Returns:
+        list: For each skill data field, a tuple of source column index,
+        skill name, skill field, and whether the tidy row's Scorer is blank.
+        Scorer is blank for the first occurrence of each of
+        NO_SCORER_SKILL_FIELDS in a row, or if normalized, for every
+        occurrence. Skill data fields which are not in the source, e.g. of a
+        dataset with fewer skills, are skipped.
+    """
+    tidy_plan: List[Tuple[int, str, str, bool]] = []
+    no_scorer_skills: List[str] = copy(NO_SCORER_SKILL_FIELDS)
+    for field in SKILL_DATA_FIELDS:
+        if field not in source_schema.index:
+            continue
+        skill_name, skill_field = SKILL_FIELD_PARTS[field]
+        no_scorer: bool = skill_field in no_scorer_skills
+        if no_scorer and not normalized:
+            no_scorer_skills.remove(skill_field)
+        tidy_plan.append(
+            (source_schema.index[field], skill_name, skill_field, no_scorer))
+    if tidy_filter is not None:
+        # after finding first occurrences, so that filtered rows are the
+        # same as those of the whole plan
+        tidy_plan = [
+            x for x in tidy_plan
+            if (tidy_filter.skills is None or x[1] in tidy_filter.skills)
+            and (tidy_filter.fields is None or x[2] in tidy_filter.fields)
+            and (tidy_filter.scorers is None or not x[3])]
+
+    return tidy_plan
+
+
+def sort_wide_rows(
+    source_rows: Iterable[List[Any]],
+    source_schema: Schema,
+    dates_grouped: bool = False,
+) -> Iterable[List[Any]]:
+    """Sort wide rows by date, then by person
+
+    Args:
+        source_rows (iter): Wide rows, not including header
+        source_schema (Schema): Column plan of the wide dataset
+        dates_grouped (bool): Are rows already grouped by date, in ascending
+        date order? If so, rows are only sorted by person within each date,
+        rather than buffering and sorting all rows.
+
+    Returns:
+        iter: Sorted rows
+    """
+    if dates_grouped:
+        person_key: Callable = source_schema.getter('Person')
+        return chain.from_iterable(
+            sorted(date_rows, key=person_key)
+            for _, date_rows in groupby(
+                source_rows, key=source_schema.getter('Date')))
+
+    return sorted(source_rows, key=source_schema.getter('Date', 'Person'))
 
 
 def tidy_up(
-    source: List[List[Any]]
-) -> List[List[Any]]:
+    source: Iterable[List[Any]],
+    dates_grouped: bool = False,
+    tidy_filter: TidyFilter = None,
+    normalized: bool = False,
+) -> Iterator[List[Any]]:
     """Convert specialized wide personnel dataset to tidy dataset
 
+    Tidy rows are yielded as they are produced, so that they can be streamed
+    to a file or to another transform.
+
     Args:
-        source (list): Source wide dataset
+        source (iter): Source wide dataset, including header. Can be a list,
+        or an iterator such as generated rows.
+        dates_grouped (bool): Are source rows already grouped by date, in
+        ascending date order, as with a generated dataset? If so, rows are
+        only sorted by person within each date, rather than buffering and
+        sorting the whole source.
+        tidy_filter (TidyFilter): Only yield these tidy rows. Wide rows are
+        filtered before they are sorted, and only selected cells of each are
+        expanded, so work scales with the selection. Defaults to all.
+        normalized (bool): Emit NO_SCORER_SKILL_FIELDS, which are the same
+        for every scorer, once per (Date, Person, Skill), with a blank
+        Scorer, rather than once per scorer row? They are taken from the
+        first wide row of each date and person, as `tidy_to_skill.transform`
+        would, so skill datasets transformed from either output are the
+        same.
 
     Returns:
-        list: Tidied up dataset
+        iter: Tidied up dataset, including header
     """
-    source_header: List[str] = source[0]
+    source_rows: Iterator[List[Any]] = iter(source)
+    source_header: List[str] = next(source_rows)
+    source_schema: Schema = get_schema(source_header)
+    date_idx, person_idx, scorer_idx = \
+        source_schema.indices('Date', 'Person', 'Scorer')
+    predicate: Optional[Callable] = \
+        get_row_predicate(source_schema, tidy_filter)
+    if predicate is not None:
+        source_rows = filter(predicate, source_rows)
 
-    # sort
-    source_data_sorted: List[List[Any]] = sorted(source[1:], key=lambda x: (
-        x[source_header.index('Date')],
-        x[source_header.index('Person')]))
-    source_sorted: List[List[Any]] = [source_header] + source_data_sorted
+    source_data_sorted: Iterable[List[Any]] = \
+        sort_wide_rows(source_rows, source_schema, dates_grouped)
 
     # tidy up
     tidy_header: List[str] = HEADER
-    tidy_dataset: List[List[Any]] = [tidy_header, ]
-    for row in source_sorted[1:]:
-        no_scorer_skills: List[str] = copy(NO_SCORER_SKILL_FIELDS)
-        for idx, field in enumerate(SKILL_DATA_FIELDS):
-            new_row: List[Any] = [None for _ in range(len(tidy_header))]
-            skill_name: str = field.split('_')[0]
-            skill_field: str = field.replace(skill_name + '_', '')
-
-            new_row[tidy_header.index('Date')]: date \
-                = row[source_header.index('Date')]
-            new_row[tidy_header.index('Person')]: str \
-                = row[source_header.index('Person')]
-            new_row[tidy_header.index('Scorer')]: str \
-                = row[source_header.index('Scorer')]
-            new_row[tidy_header.index('Skill')]: str \
-                = skill_name
-            new_row[tidy_header.index('SkillField')]: str \
-                = skill_field
-            new_row[tidy_header.index('Value')]: str \
-                = row[source_header.index(field)]
-
-            if skill_field in no_scorer_skills:
-                new_row[tidy_header.index('Scorer')] = None
-                no_scorer_skills.remove(skill_field)
-
-            tidy_dataset.append(new_row)
-
-    return tidy_dataset
+    tidy_schema: Schema = get_schema(tidy_header)
+    tidy_date_idx, tidy_person_idx, tidy_scorer_idx, tidy_skill_idx, \
+        tidy_skill_field_idx, tidy_value_idx = tidy_schema.indices(
+            'Date', 'Person', 'Scorer', 'Skill', 'SkillField', 'Value')
+    tidy_plan: List[Tuple[int, str, str, bool]] = \
+        get_tidy_plan(source_schema, tidy_filter, normalized)
+    # plan of each further wide row of a date and person, if normalized
+    scorer_plan: List[Tuple[int, str, str, bool]] = \
+        [x for x in tidy_plan if not x[3]] if normalized else tidy_plan
+    yield tidy_header
+    person_date: Optional[Tuple[date, str]] = None
+    for row in source_data_sorted:
+        row_date: date = row[date_idx]
+        row_person: str = row[person_idx]
+        row_scorer: str = row[scorer_idx]
+        row_plan: List[Tuple[int, str, str, bool]] = tidy_plan
+        if normalized:
+            if (row_date, row_person) == person_date:
+                row_plan = scorer_plan
+            person_date = (row_date, row_person)
+        for field_idx, skill_name, skill_field, no_scorer in row_plan:
+            new_row: List[Any] = [None] * len(tidy_header)
+            new_row[tidy_date_idx] = row_date
+            new_row[tidy_person_idx] = row_person
+            new_row[tidy_scorer_idx] = None if no_scorer else row_scorer
+            new_row[tidy_skill_idx] = skill_name
+            new_row[tidy_skill_field_idx] = skill_field
+            new_row[tidy_value_idx] = row[field_idx]
+            yield new_row
+
+
+def tidy_up_table(
+    source: Iterable[List[Any]],
+    dates_grouped: bool = False,
+    tidy_filter: TidyFilter = None,
+    normalized: bool = False,
+) -> TidyTable:
+    """Convert specialized wide personnel dataset to a compact tidy table
+
+    Same rows as `tidy_up`, but dictionary encoded straight into a
+    TidyTable, without creating a list per tidy row.
+
+    Args:
+        source (iter): Source wide dataset, including header. Can be a list,
+        or an iterator such as generated rows.
+        dates_grouped (bool): Are source rows already grouped by date, in
+        ascending date order, as with a generated dataset?
+        tidy_filter (TidyFilter): Only keep these tidy rows, see `tidy_up`
+        normalized (bool): Keep capacities once per (Date, Person, Skill)?
+        See `tidy_up`.
+
+    Returns:
+        TidyTable: Tidied up dataset
+    """
+    source_rows: Iterator[List[Any]] = iter(source)
+    source_schema: Schema = get_schema(next(source_rows))
+    date_idx, person_idx, scorer_idx = \
+        source_schema.indices('Date', 'Person', 'Scorer')
+    predicate: Optional[Callable] = \
+        get_row_predicate(source_schema, tidy_filter)
+    if predicate is not None:
+        source_rows = filter(predicate, source_rows)
+    source_data_sorted: Iterable[List[Any]] = \
+        sort_wide_rows(source_rows, source_schema, dates_grouped)
+
+    table = TidyTable(HEADER)
+    tidy_date_idx, tidy_person_idx, tidy_scorer_idx, tidy_skill_idx, \
+        tidy_skill_field_idx, tidy_value_idx = get_schema(HEADER).indices(
+            'Date', 'Person', 'Scorer', 'Skill', 'SkillField', 'Value')
+    dates, persons, scorers, skills, skill_fields, values = \
+        (table.categories[x] for x in (
+            tidy_date_idx, tidy_person_idx, tidy_scorer_idx, tidy_skill_idx,
+            tidy_skill_field_idx, tidy_value_idx))
+    tidy_plan: List[Tuple[int, str, str, bool]] = \
+        get_tidy_plan(source_schema, tidy_filter, normalized)
+
+    def get_plan_codes(
+        plan: List[Tuple[int, str, str, bool]],
+    ) -> Optional[Tuple[Any, ...]]:
+        # codes to extend columns with, for each row tidied with plan
+        if not plan:
+            return None
+        value_indices: List[int] = [x[0] for x in plan]
+        value_getter: Callable = itemgetter(*value_indices) \
+            if len(plan) > 1 else lambda row: (row[value_indices[0]],)
+        return (plan, len(plan), [skills[x[1]] for x in plan],
+                [skill_fields[x[2]] for x in plan], value_getter, {})
+
+    plan_codes: Optional[Tuple[Any, ...]] = get_plan_codes(tidy_plan)
+    # codes of each further wide row of a date and person, if normalized
+    scorer_plan_codes: Optional[Tuple[Any, ...]] = get_plan_codes(
+        [x for x in tidy_plan if not x[3]]) if normalized else plan_codes
+    person_date: Optional[Tuple[date, str]] = None
+    for row in source_data_sorted:
+        row_codes: Optional[Tuple[Any, ...]] = plan_codes
+        if normalized:
+            if (row[date_idx], row[person_idx]) == person_date:
+                row_codes = scorer_plan_codes
+            person_date = (row[date_idx], row[person_idx])
+        if row_codes is None:
+            continue
+        plan, num_fields, skill_codes, skill_field_codes, value_getter, \
+            scorer_codes = row_codes
+        row_scorer: str = row[scorer_idx]
+        if row_scorer not in scorer_codes:
+            scorer_codes[row_scorer] = [
+                scorers[None if x[3] else row_scorer] for x in plan]
+        table.extend_codes(tidy_date_idx, [dates[row[date_idx]]] * num_fields)
+        table.extend_codes(
+            tidy_person_idx, [persons[row[person_idx]]] * num_fields)
+        table.extend_codes(tidy_scorer_idx, scorer_codes[row_scorer])
+        table.extend_codes(tidy_skill_idx, skill_codes)
+        table.extend_codes(tidy_skill_field_idx, skill_field_codes)
+        table.extend_codes(
+            tidy_value_idx, list(map(values.__getitem__, value_getter(row))))
+
+    return table
 
 
 def run(
     config: Dict = CONFIG,
     save: bool = True
-) -> List[List[Any]]:
+) -> Iterator[List[Any]]:
     """Run the module.
 
     Args:
@@ -117,22 +607,137 @@ def run(
         save (bool): Save CSV output? If not, returns dataset.
 
     Returns:
-        list: Resulting dataset, if not save CSV output.
+        iter: Resulting dataset rows, including header, if not save CSV
+        output.
+
+    Raises:
+        ValueError: If a 'filter_*' option is invalid, see `get_tidy_filter`
     """
-    source: List[List[str]] = \
-        load_csv(config['input_file_path'])
-    source_formatted: List[List[Union[str, int, date]]] = \
-        format_loaded_csv(source)
-    dataset: List[List[Any]] = tidy_up(source_formatted)
+    tidy_filter: Optional[TidyFilter] = get_tidy_filter(config)
+    cache: Optional[WideCache] = load_cache(config)
+    source_formatted: Iterator[List[Union[str, int, date]]] = iter_stage(
+        'format', iter_formatted_cache(cache, config['input_date_format'])
+        if cache is not None else iter_formatted_csv(
+            filter_wide_rows(
+                iter_stage('load', iter_dataset(
+                    config['input_file_path'], config['input_sheet_name'],
+                    config['input_date_format'], config['input_prefetch'])),
+                tidy_filter, config['input_date_format']),
+            config['input_date_format']))
+    dataset: Iterator[List[Any]] = \
+        iter_stage('tidy', tidy_up(source_formatted, tidy_filter=tidy_filter,
+                                   normalized=config['normalized']))
 
     if save:
-        save_csv(
-            array=dataset,
-            path=config['output_file_path'])
-        print('Saved to: ' + config['output_file_path'])
+        with stage('save'):
+            output_path: str = save_dataset(
+                array=dataset,
+                path=config['output_file_path'],
+                output_format=config['output_format'],
+                compression=config['output_compression'],
+                sheet_name=config['output_sheet_name'],
+                partition_by=config['output_partition_by'],
+                rows_per_part=config['output_rows_per_part'])
+        print('Saved to: ' + output_path)
     else:
         return dataset
 
 
+def add_filter_arguments(
+    parser: argparse.ArgumentParser,
+    config: Dict[str, Any] = CONFIG,
+):
+    """Add tidy row filter options to a command line parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+        config (dict): Configuration, for 'filter_*' defaults
+    """
+    parser.add_argument(
+        '--skills', dest='filter_skills', nargs='+', metavar='SKILL',
+        default=config['filter_skills'],
+        help='Only output rows of these skills, e.g. A1 B2')
+    parser.add_argument(
+        '--fields', dest='filter_fields', nargs='+', metavar='FIELD',
+        choices=SKILL_FIELD_REPEATS, default=config['filter_fields'],
+        help='Only output rows of these skill fields, of: ' +
+             ', '.join(SKILL_FIELD_REPEATS))
+    parser.add_argument(
+        '--scorers', dest='filter_scorers', nargs='+', metavar='SCORER',
+        default=config['filter_scorers'],
+        help='Only output rows of these scorers. Rows without a scorer, '
+             'e.g. capacities, are left out.')
+    parser.add_argument(
+        '--persons', dest='filter_persons', nargs='+', metavar='PERSON',
+        default=config['filter_persons'],
+        help='Only output rows of these persons')
+    parser.add_argument(
+        '--start-date', dest='filter_start_date', type=date.fromisoformat,
+        metavar='YYYY-MM-DD', default=config['filter_start_date'],
+        help='Only output rows of this date or later')
+    parser.add_argument(
+        '--end-date', dest='filter_end_date', type=date.fromisoformat,
+        metavar='YYYY-MM-DD', default=config['filter_end_date'],
+        help='Only output rows of this date or earlier')
+
+
+def add_input_date_format_argument(
+    parser: argparse.ArgumentParser,
+    config: Dict[str, Any] = CONFIG,
+):
+    """Add input date format option to a command line parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+        config (dict): Configuration, for 'input_date_format' default
+    """
+    parser.add_argument(
+        '--input-date-format', dest='input_date_format', metavar='FORMAT',
+        default=config['input_date_format'],
+        help='strptime format of input dates. ISO dates, e.g. of generated '
+             'datasets, are read either way. (default: %(default)s)')
+
+
+def add_normalized_argument(
+    parser: argparse.ArgumentParser,
+    config: Dict[str, Any] = CONFIG,
+):
+    """Add normalized tidy output option to a command line parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+        config (dict): Configuration, for 'normalized' default
+    """
+    parser.add_argument(
+        '--normalized', action='store_true', default=config['normalized'],
+        help='Output current and targeted capacities once per date, person '
+             'and skill, with a blank Scorer, rather than once per scorer')
+
+
+def main(argv: List[str] = None):
+    """Command line entry point
+
+    Args:
+        argv (list): Command line arguments. Defaults to sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        description='Convert personnel dataset to tidy dataset')
+    parser.add_argument(
+        '-i', '--input', dest='input_file_path', metavar='PATH',
+        default=CONFIG['input_file_path'],
+        help='Path to personnel dataset CSV, Excel workbook, or partitioned '
+             'dataset directory (default: %(default)s)')
+    add_input_sheet_argument(parser, CONFIG)
+    add_input_date_format_argument(parser, CONFIG)
+    add_prefetch_argument(parser, CONFIG)
+    add_cache_arguments(parser, CONFIG)
+    add_filter_arguments(parser, CONFIG)
+    add_normalized_argument(parser, CONFIG)
+    add_output_arguments(parser, CONFIG)
+    add_profile_arguments(parser)
+    args: argparse.Namespace = parser.parse_args(argv)
+    run_profiled(run, args, {**CONFIG, **vars(args)})
+
+
 if __name__ == '__main__':
-    run(CONFIG)
+    main()
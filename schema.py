@@ -0,0 +1,142 @@
+"""Precomputed column plans shared by dataset generation and transforms
+
+Resolving a column by name with `list.index`, or a skill and its field type
+with `str.split`, is linear in the width of the header. The wide personnel
+header has 500+ columns, so these lookups are resolved once per header here,
+rather than once per cell in the hot loops.
+"""
+from functools import lru_cache
+from operator import itemgetter
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, \
+    Tuple
+
+from config import SKILL_FIELD_REPEATS, SKILLS
+
+
+SKILL_FIELD_PARTS: Dict[str, Tuple[str, str]] = {
+    '{}_{}'.format(skill, field_type): (skill, field_type)
+    for skill in SKILLS
+    for field_type in SKILL_FIELD_REPEATS}
+
+
+class SkillColumn(NamedTuple):
+    """A skill data column of a wide header
+
+    Attributes:
+        index (int): Column index in the header
+        field (str): Full field name, e.g. 'A1_score'
+        skill (str): Skill name, e.g. 'A1'
+        field_type (str): Skill field type, e.g. 'score'
+    """
+    index: int
+    field: str
+    skill: str
+    field_type: str
+
+
+class Schema:
+    """Column plan of a dataset header
+
+    Attributes:
+        header (tuple): Field names, in column order
+        index (dict): Column index by field name
+        skill_columns (list): SkillColumn for every skill data field in the
+        header, in header order
+        skill_columns_by_index (dict): SkillColumn by column index
+        skill_field_index (dict): Column index by (skill, field type)
+        indices_by_field_type (dict): Column indices of each skill field
+        type, in header order
+    """
+
+    def __init__(self, header: Sequence[str]):
+        """Resolve column plan
+
+        Args:
+            header (list): Header of dataset containing fields
+        """
+        self.header: Tuple[str, ...] = tuple(header)
+        self.index: Dict[str, int] = {}
+        for idx, field in enumerate(self.header):
+            self.index.setdefault(field, idx)
+
+        self.skill_columns: List[SkillColumn] = [
+            SkillColumn(idx, field, *SKILL_FIELD_PARTS[field])
+            for idx, field in enumerate(self.header)
+            if field in SKILL_FIELD_PARTS]
+        self.skill_columns_by_index: Dict[int, SkillColumn] = {
+            x.index: x for x in self.skill_columns}
+        self.skill_field_index: Dict[Tuple[str, str], int] = {
+            (x.skill, x.field_type): x.index for x in self.skill_columns}
+        self.indices_by_field_type: Dict[str, List[int]] = {
+            field_type: [x.index for x in self.skill_columns
+                         if x.field_type == field_type]
+            for field_type in SKILL_FIELD_REPEATS}
+
+    def __len__(self) -> int:
+        return len(self.header)
+
+    def indices(self, *fields: str) -> List[int]:
+        """Get column indices of fields
+
+        Args:
+            *fields (str): Field names
+
+        Returns:
+            list: Column indices
+        """
+        return [self.index[x] for x in fields]
+
+    def getter(self, *fields: str) -> Callable:
+        """Get a function that picks given fields from a row
+
+        Useful as a sort key. Like `operator.itemgetter`, returns a tuple for
+        more than one field.
+
+        Args:
+            *fields (str): Field names
+
+        Returns:
+            func: Row to value(s) function
+        """
+        return itemgetter(*self.indices(*fields))
+
+
+def indices_to_slice(indices: Sequence[int]) -> Optional[slice]:
+    """Get a slice equivalent to evenly spaced column indices
+
+    Columns of one skill field type are evenly spaced in a wide header, so
+    they can be read and written with one slice per row, e.g.
+    `row[5::6] = scores`, rather than one index per cell.
+
+    Args:
+        indices (list): Column indices, in ascending order
+
+    Returns:
+        slice: Equivalent slice, or None if indices are not evenly spaced
+    """
+    if not indices:
+        return None
+    if len(indices) == 1:
+        return slice(indices[0], indices[0] + 1)
+    step: int = indices[1] - indices[0]
+    if step <= 0 or any(b - a != step for a, b in zip(indices, indices[1:])):
+        return None
+
+    return slice(indices[0], indices[-1] + 1, step)
+
+
+@lru_cache(maxsize=None)
+def _get_schema(header: Tuple[str, ...]) -> Schema:
+    return Schema(header)
+
+
+def get_schema(header: Sequence[str]) -> Schema:
+    """Get column plan of a header, resolved once per distinct header
+
+    Args:
+        header (list): Header of dataset containing fields
+
+    Returns:
+        Schema: Column plan
+    """
+    return _get_schema(tuple(header))
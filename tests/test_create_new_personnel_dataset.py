@@ -0,0 +1,204 @@
+import csv
+import os
+from random import Random
+
+import pytest
+
+import create_new_personnel_dataset
+from create_new_personnel_dataset import CONFIG, HEADER, NUM_SCORERS, \
+    RAND_SCORE_FIELD_TYPES, batch_random_mutation, extend_dataset, \
+    generate_baseline, generate_dataset, generate_dataset_incremental, run, \
+    update_person_cache
+from schema import get_schema
+
+PERSONNEL = ['Alice', 'Bob', 'Carol']
+
+
+@pytest.mark.parametrize('timeseries_mode', ['batched', 'per_cell'])
+@pytest.mark.parametrize('engine', ['python', 'template', 'numpy'])
+def test_scores_within_configured_range(engine, timeseries_mode):
+    config = {**CONFIG, 'seed': 1, 'engine': engine, 'score_min': 2,
+              'score_max': 3, 'mutation_pct_chance': 1,
+              'timeseries_mode': timeseries_mode}
+    indices_by_field_type = get_schema(HEADER).indices_by_field_type
+    scores = [row[idx] for row in generate_dataset(config, PERSONNEL)
+              for field_type in RAND_SCORE_FIELD_TYPES
+              for idx in indices_by_field_type[field_type]]
+
+    assert set(scores) == {2, 3}
+
+
+@pytest.mark.parametrize('options', [
+    {}, {'pct_chance': 0}, {'pct_chance': 1},
+    {'min_increment': 1, 'max_increment': 3, 'pct_chance': 0.7}])
+def test_batch_random_mutation_same_without_numpy(monkeypatch, options):
+    baseline = generate_baseline(
+        PERSONNEL, {**CONFIG, 'engine': 'template'}, Random(1))
+    with_numpy = batch_random_mutation(baseline, rng=Random(2), **options)
+    import_optional = create_new_personnel_dataset.import_optional
+    monkeypatch.setattr(
+        create_new_personnel_dataset, 'import_optional',
+        lambda name: None if name == 'numpy' else import_optional(name))
+
+    assert batch_random_mutation(baseline, rng=Random(2), **options) \
+        == with_numpy
+
+
+@pytest.mark.parametrize('engine', ['template', 'numpy'])
+def test_same_output_for_any_number_of_workers(engine):
+    config = {**CONFIG, 'seed': 1, 'engine': engine, 'shard_size': 1}
+    rows = list(generate_dataset(config, PERSONNEL))
+
+    assert len(rows) == len(PERSONNEL) * NUM_SCORERS \
+        * (CONFIG['progression_timeseries_iters'] + 1)
+    assert list(generate_dataset({**config, 'workers': 2}, PERSONNEL)) \
+        == rows
+
+
+def get_config(cache_dir, **options):
+    return {**CONFIG, 'seed': 1, 'engine': 'template', 'incremental': True,
+            'cache_dir': str(cache_dir), **options}
+
+
+def test_incremental_reuses_cached_people(tmp_path):
+    config = get_config(tmp_path)
+    first = update_person_cache(config, PERSONNEL)
+    second = update_person_cache(config, PERSONNEL + ['Dan'])
+
+    assert first.num_generated == 3
+    assert second.num_generated == 1
+    assert all(second.blocks[x] == first.blocks[x] for x in PERSONNEL)
+
+
+def test_incremental_cache_invalidated_by_generation_options(tmp_path):
+    update_person_cache(get_config(tmp_path), PERSONNEL)
+    update = update_person_cache(
+        get_config(tmp_path, mutation_pct_chance=0.5), PERSONNEL)
+
+    assert update.num_generated == 3
+
+
+def test_incremental_cache_kept_across_iterations(tmp_path):
+    update_person_cache(get_config(tmp_path), PERSONNEL)
+    config = get_config(tmp_path, progression_timeseries_iters=1)
+    update = update_person_cache(config, PERSONNEL)
+    fresh_config = get_config(
+        tmp_path / 'fresh', progression_timeseries_iters=1)
+
+    assert update.num_generated == 0
+    assert list(generate_dataset_incremental(config, cache_update=update)) \
+        == list(generate_dataset_incremental(fresh_config, PERSONNEL))
+
+
+def test_incremental_only_removes_own_stale_files(tmp_path):
+    config = get_config(tmp_path)
+    update_person_cache(config, PERSONNEL)
+    for file_name in ['other.pickle', 'notes.txt']:
+        (tmp_path / file_name).write_text('')
+    update = update_person_cache(config, PERSONNEL[:1])
+
+    assert update.num_removed == 2
+    assert sorted(x for x in os.listdir(tmp_path)
+                  if not x.startswith('person-')) \
+        == ['notes.txt', 'other.pickle']
+
+
+def read_tree(path):
+    return {os.path.relpath(os.path.join(root, x), path):
+            open(os.path.join(root, x), 'rb').read()
+            for root, _, files in os.walk(path) for x in files}
+
+
+def run_incremental(tmp_path, name, personnel, **options):
+    personnel_path = tmp_path / (name + '.txt')
+    personnel_path.write_text('\n'.join(personnel) + '\n')
+    config = get_config(tmp_path / (name + '_cache'),
+                        input_personnel_list_path=str(personnel_path),
+                        output_file_path=str(tmp_path / (name + '.csv')),
+                        **options)
+    run(config)
+
+    return str(tmp_path / name) if options.get('output_partition_by') \
+        else str(tmp_path / (name + '.csv'))
+
+
+@pytest.mark.parametrize('partition_by', [None, 'Person'])
+def test_incremental_splices_changed_people_into_output(
+        tmp_path, monkeypatch, partition_by):
+    path = run_incremental(tmp_path, 'output', PERSONNEL,
+                           output_partition_by=partition_by)
+    before = read_tree(path) if partition_by else None
+    loaded = []
+    load_person_block = create_new_personnel_dataset.load_person_block
+    monkeypatch.setattr(
+        create_new_personnel_dataset, 'load_person_block',
+        lambda person, *args: loaded.append(person)
+        or load_person_block(person, *args))
+    personnel = ['Dan', 'Bob', 'Carol', 'Erin']
+    run_incremental(tmp_path, 'output', personnel,
+                    output_partition_by=partition_by)
+    spliced_loaded = list(loaded)
+    fresh_path = run_incremental(tmp_path, 'fresh', personnel,
+                                 output_partition_by=partition_by)
+
+    assert spliced_loaded == ['Dan', 'Erin']
+    if partition_by:
+        after = read_tree(path)
+        assert after == read_tree(fresh_path)
+        assert {x: after[x] for x in before if 'Alice' not in x} \
+            == {x: before[x] for x in before if 'Alice' not in x}
+    else:
+        assert open(path, 'rb').read() == open(fresh_path, 'rb').read()
+
+
+def test_incremental_rewrites_output_changed_since_saved(tmp_path):
+    path = run_incremental(tmp_path, 'output', PERSONNEL)
+    with open(path, 'a') as f:
+        f.write('edited\n')
+    run_incremental(tmp_path, 'output', PERSONNEL[1:])
+    fresh_path = run_incremental(tmp_path, 'fresh', PERSONNEL[1:])
+
+    assert open(path, 'rb').read() == open(fresh_path, 'rb').read()
+
+
+@pytest.mark.parametrize('partition_by', [None, 'Date'])
+def test_extend_leaves_existing_bytes_untouched(tmp_path, partition_by):
+    personnel_path = tmp_path / 'personnel.txt'
+    personnel_path.write_text('\n'.join(PERSONNEL) + '\n')
+    config = {**CONFIG, 'seed': 1, 'engine': 'template',
+              'input_personnel_list_path': str(personnel_path),
+              'output_file_path': str(tmp_path / 'output.csv'),
+              'output_partition_by': partition_by}
+    run(config)
+    path = str(tmp_path / ('output' if partition_by else 'output.csv'))
+    before = read_tree(path) if partition_by else open(path, 'rb').read()
+    extend_dataset({**config, 'extend_iters': 2})
+
+    if partition_by:
+        after = read_tree(path)
+        assert {x: after[x] for x in before} == before
+        assert len(after) == len(before) + 2
+    else:
+        after = open(path, 'rb').read()
+        assert after.startswith(before)
+        rows = list(csv.reader(open(path)))
+        num_timeslices = CONFIG['progression_timeseries_iters'] + 1 + 2
+        assert len(rows) \
+            == 1 + num_timeslices * len(PERSONNEL) * NUM_SCORERS
+
+
+@pytest.mark.parametrize('output_format, compression', [
+    ('parquet', 'none'), ('sqlite', 'none'), ('csv', 'gzip')])
+def test_extend_rejects_partitions_other_than_csv(output_format,
+                                                  compression):
+    with pytest.raises(ValueError, match='uncompressed CSV'):
+        extend_dataset({**CONFIG, 'extend_iters': 1,
+                        'output_partition_by': 'Date',
+                        'output_format': output_format,
+                        'output_compression': compression})
+
+
+def test_extend_missing_dataset(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        extend_dataset({**CONFIG, 'extend_iters': 1,
+                        'output_file_path': str(tmp_path / 'output.csv')})
@@ -0,0 +1,36 @@
+import pytest
+
+from create_new_personnel_dataset import generate_dataset
+from create_new_scenario_datasets import CONFIG, generate_scenario, \
+    get_scenario_configs
+
+PERSONNEL = ['Alice', 'Bob', 'Carol']
+SCENARIOS = [
+    {'mutation_pct_chance': 0.1},
+    {'mutation_pct_chance': 0.9, 'timeseries_cumulative': True},
+    {'progression_timeseries_iters': 1, 'timeseries_mode': 'per_cell'},
+    {'seed': 2},
+]
+
+
+@pytest.mark.parametrize('engine', ['template', 'numpy'])
+def test_scenarios_same_as_standalone_runs(engine):
+    configs = get_scenario_configs(
+        SCENARIOS, {**CONFIG, 'seed': 1, 'engine': engine, 'shard_size': 2})
+
+    for config in configs:
+        assert list(generate_scenario(config, PERSONNEL)) \
+            == list(generate_dataset(config, PERSONNEL))
+
+
+def test_scenarios_without_seed_share_one():
+    configs = get_scenario_configs(SCENARIOS[:2], CONFIG)
+
+    assert configs[0]['seed'] is not None
+    assert configs[0]['seed'] == configs[1]['seed']
+
+
+@pytest.mark.parametrize('scenario', [{'workers': 2}, {'unknown': 1}])
+def test_scenario_options_rejected(scenario):
+    with pytest.raises(ValueError):
+        get_scenario_configs([scenario], CONFIG)
@@ -0,0 +1,14 @@
+from create_new_tidy_dataset import CONFIG, generate_tidy_dataset, \
+    generate_tidy_table
+
+PERSONNEL = ['Alice', 'Bob', 'Carol']
+TIDY_CONFIG = {**CONFIG, 'seed': 1, 'engine': 'template', 'shard_size': 1}
+
+
+def test_chunked_rows_tidied_as_unchunked():
+    chunked_config = {**TIDY_CONFIG, 'chunked': True}
+
+    assert list(generate_tidy_dataset(chunked_config, PERSONNEL)) \
+        == list(generate_tidy_dataset(TIDY_CONFIG, PERSONNEL))
+    assert list(generate_tidy_table(chunked_config, PERSONNEL)) \
+        == list(generate_tidy_table(TIDY_CONFIG, PERSONNEL))
@@ -0,0 +1,49 @@
+import argparse
+
+import pytest
+
+from create_new_personnel_dataset import get_parser
+from instrumentation import PROFILE_ENV_VAR, get_env_flag, run_profiled
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1', True), ('true', True), ('YES', True), (' on ', True),
+    ('0', False), ('false', False), ('No', False), ('', False),
+])
+def test_get_env_flag(monkeypatch, value, expected):
+    monkeypatch.setenv(PROFILE_ENV_VAR, value)
+    assert get_env_flag(PROFILE_ENV_VAR) is expected
+
+
+def test_get_env_flag_unset(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV_VAR, raising=False)
+    assert get_env_flag(PROFILE_ENV_VAR) is False
+
+
+def test_get_env_flag_rejects_other_values(monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV_VAR, 'maybe')
+    with pytest.raises(ValueError):
+        get_env_flag(PROFILE_ENV_VAR)
+
+
+def test_invalid_env_flag_warns_and_leaves_profiling_off(monkeypatch,
+                                                         capsys):
+    monkeypatch.setenv(PROFILE_ENV_VAR, 'maybe')
+    with pytest.raises(SystemExit) as exc_info:
+        get_parser().parse_args(['--help'])
+    assert exc_info.value.code == 0
+
+    args = get_parser().parse_args([])
+    assert run_profiled(lambda: 'done', args) == 'done'
+    captured = capsys.readouterr()
+    assert PROFILE_ENV_VAR in captured.err
+    assert 'total:' not in captured.out
+
+
+def test_profile_options_override_env(monkeypatch, capsys):
+    monkeypatch.setenv(PROFILE_ENV_VAR, 'maybe')
+    args = argparse.Namespace(profile=True, profile_memory=None,
+                              profile_json=None, cprofile=None)
+    run_profiled(lambda: None, args)
+
+    assert capsys.readouterr().err == ''
@@ -0,0 +1,21 @@
+import pytest
+
+from create_new_personnel_dataset import CONFIG as PERSONNEL_CONFIG, \
+    HEADER as PERSONNEL_HEADER, generate_dataset
+from personnel_to_skill import transform
+from personnel_to_tidy import CONFIG as TIDY_CONFIG, run as load
+from tidy_to_skill import transform as tidy_to_skill
+from utils import iter_csv, save_csv
+
+
+@pytest.mark.parametrize('engine', ['template', 'numpy'])
+def test_transform_same_as_tidy_to_skill(tmp_path, engine):
+    path = str(tmp_path / 'input.csv')
+    save_csv([PERSONNEL_HEADER] + list(generate_dataset(
+        {**PERSONNEL_CONFIG, 'seed': 1, 'engine': engine},
+        ['Alice', 'Bob', 'Carol'])), path)
+    tidy = load({**TIDY_CONFIG, 'input_file_path': path}, save=False)
+    skill = transform(iter_csv(path))
+
+    assert len(skill) > 1
+    assert skill == tidy_to_skill(tidy)
@@ -0,0 +1,132 @@
+from datetime import date, datetime
+
+import pytest
+
+from config import NO_SCORER_SKILL_FIELDS
+from create_new_personnel_dataset import CONFIG as PERSONNEL_CONFIG, \
+    HEADER as PERSONNEL_HEADER, generate_dataset, run as personnel_run
+from personnel_to_tidy import CONFIG, HEADER, TidyFilter, \
+    format_loaded_csv, run, tidy_up, tidy_up_table
+from schema import get_schema
+from tidy_to_skill import transform as tidy_to_skill
+from utils import encode_csv_value, save_xlsx
+
+WIDE = [PERSONNEL_HEADER] + list(generate_dataset(
+    {**PERSONNEL_CONFIG, 'seed': 1, 'engine': 'template'},
+    ['Alice', 'Bob', 'Carol']))
+FILTERS = [
+    TidyFilter(skills=frozenset(['A1', 'B2'])),
+    TidyFilter(fields=frozenset(['score', 'current_capacity'])),
+    TidyFilter(scorers=frozenset(['Self', 'PI'])),
+    TidyFilter(persons=frozenset(['Bob'])),
+    TidyFilter(start_date=date(2019, 12, 1), end_date=date(2020, 3, 1)),
+    TidyFilter(skills=frozenset(['A1']), fields=frozenset(['score']),
+               scorers=frozenset(['DM']), persons=frozenset(['Alice'])),
+]
+
+
+def format_naively(raw_rows, date_format):
+    schema = get_schema(raw_rows[0])
+    notes_indices = set(schema.indices_by_field_type['notes'])
+    formatted = [raw_rows[0]]
+    for raw_row in raw_rows[1:]:
+        row = list(raw_row)
+        row[schema.index['Date']] = \
+            datetime.strptime(row[schema.index['Date']], date_format).date()
+        for column in schema.skill_columns:
+            if column.index not in notes_indices:
+                value = row[column.index]
+                row[column.index] = int(value) if value else None
+        formatted.append(row)
+
+    return formatted
+
+
+@pytest.mark.parametrize('date_format', ['%m/%d/%y', '%Y-%m-%d'])
+def test_format_loaded_csv_same_as_naive_parse(date_format):
+    raw = [WIDE[0]] + [
+        [x.strftime(date_format) if isinstance(x, date)
+         else encode_csv_value(x) for x in row] for row in WIDE[1:]]
+    raw_copy = [list(x) for x in raw]
+    formatted = format_loaded_csv(raw, date_format)
+
+    assert formatted == format_naively(raw, date_format)
+    assert raw == raw_copy
+
+
+def is_kept(row, tidy_filter):
+    row_date, person, scorer, skill, skill_field, _ = row
+    return (tidy_filter.skills is None or skill in tidy_filter.skills) \
+        and (tidy_filter.fields is None or skill_field in tidy_filter.fields) \
+        and (tidy_filter.scorers is None or scorer in tidy_filter.scorers) \
+        and (tidy_filter.persons is None or person in tidy_filter.persons) \
+        and (tidy_filter.start_date is None
+             or row_date >= tidy_filter.start_date) \
+        and (tidy_filter.end_date is None
+             or row_date <= tidy_filter.end_date)
+
+
+@pytest.mark.parametrize('normalized', [False, True])
+@pytest.mark.parametrize('tidy_filter', FILTERS)
+def test_filter_keeps_exactly_matching_tidy_rows(tidy_filter, normalized):
+    tidy = list(tidy_up(WIDE, normalized=normalized))
+    expected = [HEADER] + [x for x in tidy[1:] if is_kept(x, tidy_filter)]
+
+    assert len(expected) > 1
+    assert list(tidy_up(WIDE, tidy_filter=tidy_filter,
+                        normalized=normalized)) == expected
+    assert list(tidy_up_table(WIDE, tidy_filter=tidy_filter,
+                              normalized=normalized)) == expected
+
+
+def test_run_reads_generated_partitioned_dataset(tmp_path):
+    (tmp_path / 'personnel.txt').write_text('Alice\nBob\nCarol\n')
+    personnel_config = {
+        **PERSONNEL_CONFIG, 'seed': 1, 'engine': 'template',
+        'input_personnel_list_path': str(tmp_path / 'personnel.txt')}
+    for path, partition_by in [('input.csv', None), ('input', 'Date')]:
+        personnel_run({**personnel_config, 'output_partition_by': partition_by,
+                       'output_file_path': str(tmp_path / path)})
+    tidy = [list(run({**CONFIG, 'input_file_path': str(tmp_path / path)},
+                     save=False)) for path in ['input.csv', 'input']]
+
+    assert tidy[0] == tidy[1]
+    assert [x[:5] for x in tidy[1]] == [x[:5] for x in tidy_up(WIDE)]
+
+
+def test_normalized_same_as_unnormalized_without_repeated_capacities():
+    seen = set()
+    expected = []
+    for row in tidy_up(WIDE):
+        if row[4] in NO_SCORER_SKILL_FIELDS:
+            row_date, person, _, skill, skill_field, value = row
+            if (row_date, person, skill, skill_field) in seen:
+                continue
+            seen.add((row_date, person, skill, skill_field))
+            row = [row_date, person, None, skill, skill_field, value]
+        expected.append(row)
+
+    assert list(tidy_up(WIDE, normalized=True)) == expected
+    assert list(tidy_up_table(WIDE, normalized=True)) == expected
+
+
+@pytest.mark.parametrize('include_scorer_skills', [False, True])
+def test_skill_from_normalized_same_as_unnormalized(include_scorer_skills):
+    assert tidy_to_skill(tidy_up(WIDE, normalized=True),
+                         include_scorer_skills) \
+        == tidy_to_skill(tidy_up(WIDE), include_scorer_skills)
+
+
+def test_run_reads_xlsx_as_equivalent_csv(tmp_path):
+    pytest.importorskip('openpyxl')
+    csv_path = tmp_path / 'input.csv'
+    csv_path.write_text(''.join(
+        ','.join(x.strftime(CONFIG['input_date_format'])
+                 if isinstance(x, date) else encode_csv_value(x)
+                 for x in row) + '\n' for row in WIDE))
+    save_xlsx(WIDE, str(tmp_path / 'input.xlsx'), CONFIG['input_sheet_name'])
+    tidy = [list(run({**CONFIG, 'input_file_path': str(tmp_path / path)},
+                     save=False)) for path in ['input.csv', 'input.xlsx']]
+
+    assert tidy[0] == tidy[1]
+    assert [x[:5] for x in tidy[1]] == [x[:5] for x in tidy_up(WIDE)]
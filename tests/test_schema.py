@@ -0,0 +1,48 @@
+from random import Random
+
+import pytest
+
+from create_new_personnel_dataset import CONFIG, HEADER, generate_dataset
+from personnel_to_tidy import tidy_up
+from schema import SKILL_FIELD_PARTS, get_schema, indices_to_slice
+
+
+def test_schema_resolves_columns_as_header_lookups():
+    schema = get_schema(HEADER)
+
+    assert schema.indices('Date', 'Person', 'Scorer') \
+        == [HEADER.index(x) for x in ['Date', 'Person', 'Scorer']]
+    assert [(x.index, x.skill, x.field_type) for x in schema.skill_columns] \
+        == [(HEADER.index(x), *x.split('_', 1)) for x in HEADER
+            if x in SKILL_FIELD_PARTS]
+    for field_type, indices in schema.indices_by_field_type.items():
+        assert indices == [idx for idx, x in enumerate(HEADER)
+                           if x.endswith('_' + field_type)
+                           and x in SKILL_FIELD_PARTS]
+    assert get_schema(list(HEADER)) is schema
+
+
+@pytest.mark.parametrize('indices, expected', [
+    ([], None),
+    ([3], slice(3, 4)),
+    ([1, 3, 5], slice(1, 6, 2)),
+    ([1, 2, 4], None),
+    ([5, 3], None),
+])
+def test_indices_to_slice(indices, expected):
+    result = indices_to_slice(indices)
+
+    assert result == expected
+    if result is not None:
+        assert list(range(10))[result] == indices
+
+
+def test_tidy_up_independent_of_column_order():
+    wide = [HEADER] + list(generate_dataset(
+        {**CONFIG, 'seed': 1, 'engine': 'template'}, ['Alice', 'Bob']))
+    order = list(range(len(HEADER)))
+    Random(0).shuffle(order)
+    shuffled = [[row[idx] for idx in order] for row in wide]
+
+    assert sorted(map(repr, tidy_up(shuffled))) \
+        == sorted(map(repr, tidy_up(wide)))
@@ -0,0 +1,45 @@
+from itertools import groupby
+from operator import itemgetter
+from random import Random
+
+import pytest
+
+from create_new_personnel_dataset import CONFIG, HEADER as PERSONNEL_HEADER, \
+    generate_dataset
+from personnel_to_tidy import tidy_up, tidy_up_table
+from tidy_to_skill import HEADER, SKILL_FIELD_MAPPING, transform
+
+WIDE = [PERSONNEL_HEADER] + list(generate_dataset(
+    {**CONFIG, 'seed': 1, 'engine': 'template'}, ['Alice', 'Bob', 'Carol']))
+TIDY = list(tidy_up(WIDE))
+
+
+def transform_naively(tidy):
+    date_idx, person_idx, _, skill_idx, field_idx, value_idx = range(6)
+    key = itemgetter(skill_idx, date_idx, person_idx)
+    rows = sorted((x for x in tidy[1:] if x[field_idx] in SKILL_FIELD_MAPPING),
+                  key=key)
+    transformed = [HEADER]
+    for group_key, group in groupby(rows, key=key):
+        values = {}
+        for row in group:
+            values.setdefault(row[field_idx], row[value_idx])
+        transformed.append(list(group_key) + [
+            '' if values.get(x) is None else values[x]
+            for x in SKILL_FIELD_MAPPING])
+
+    return transformed
+
+
+def test_transform_same_as_sort_then_scan():
+    shuffled = TIDY[1:]
+    Random(0).shuffle(shuffled)
+
+    assert transform(TIDY) == transform_naively(TIDY)
+    assert transform([TIDY[0]] + shuffled) == transform_naively(TIDY)
+
+
+@pytest.mark.parametrize('include_scorer_skills', [False, True])
+def test_transform_same_for_tidy_table(include_scorer_skills):
+    assert transform(tidy_up_table(WIDE), include_scorer_skills) \
+        == transform(TIDY, include_scorer_skills)
@@ -0,0 +1,140 @@
+import csv
+import io
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+from random import Random
+
+import pytest
+
+import utils
+from utils import iter_csv_chunks, save_feather, save_npy, save_parquet, \
+    save_sqlite
+
+TYPED_ROWS = [
+    ['Date', 'Person', 'Value', 'Big', 'Note'],
+    [date(2020, 1, 1), 'A', 3, 2 ** 40, 'x'],
+    [date(2020, 2, 1), 'B', '', -1, ''],
+    [None, 'A,"b"', 1000, 0, None],
+]
+
+
+def write_csv(rows):
+    f = io.StringIO(newline='')
+    csv.writer(f).writerows(rows)
+    return f.getvalue()
+
+
+@pytest.mark.parametrize('rows', [
+    [[1.0], [1]],
+    [[1], [True], [1.0]],
+    [[0, False, 0.0, '0']],
+    [[None], [''], [], ['', None]],
+    [['a,b', 'say "hi"', 'line\nbreak', 'cr\r', ' ']],
+    [[date(2020, 1, 1), datetime(2020, 1, 1)]],
+    [[[1, 2], {'a': 1}]],
+])
+def test_iter_csv_chunks_same_as_csv_writer(rows):
+    assert ''.join(iter_csv_chunks(rows, buffer_rows=2)) == write_csv(rows)
+
+
+def test_iter_csv_chunks_same_as_csv_writer_fuzzed():
+    rng = Random(0)
+    values = [1, 1.0, True, 0, 0.0, False, -3, 2.5, None, '', '1', 'x',
+              'a,b', '"', '\n', '\r\n', date(2020, 1, 1),
+              datetime(2020, 1, 1)]
+    rows = [[rng.choice(values) for _ in range(rng.randint(0, 4))]
+            for _ in range(5000)]
+
+    assert ''.join(iter_csv_chunks(rows, buffer_rows=100)) == \
+        write_csv(rows)
+
+
+def test_save_sqlite_column_types(tmp_path):
+    path = str(tmp_path / 'output.sqlite')
+    save_sqlite([
+        ['Date', 'Person', 'Value', 'Note', 'Blank'],
+        [date(2020, 1, 1), 'A', 3, 'x', ''],
+        [date(2020, 2, 1), 'B', 'n/a', '', None],
+    ], path, 'data')
+
+    connection = sqlite3.connect(path)
+    declared = [x[2] for x in connection.execute('PRAGMA table_info(data)')]
+    rows = connection.execute(
+        'SELECT Date, Person, Value, typeof(Value), Note, Blank FROM data'
+    ).fetchall()
+    connection.close()
+
+    assert declared == ['DATE', 'TEXT', '', 'TEXT', '']
+    assert rows == [('2020-01-01', 'A', 3, 'integer', 'x', None),
+                    ('2020-02-01', 'B', 'n/a', 'text', None, None)]
+
+
+def test_save_sqlite_later_batch_of_other_types(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'SQLITE_BATCH_ROWS', 1)
+    path = str(tmp_path / 'output.sqlite')
+    save_sqlite([
+        ['Date', 'Person'],
+        [date(2020, 1, 1), 'A'],
+        ['', 'B'],
+        ['unknown', 'C'],
+    ], path, 'data')
+
+    connection = sqlite3.connect(path)
+    rows = connection.execute('SELECT Date, Person FROM data').fetchall()
+    connection.close()
+
+    assert rows == [('2020-01-01', 'A'), (None, 'B'), ('unknown', 'C')]
+
+
+def test_save_sqlite_rejects_missing_header(tmp_path):
+    with pytest.raises(ValueError):
+        save_sqlite([[date(2020, 1, 1), 'A', 3]],
+                    str(tmp_path / 'output.sqlite'))
+
+
+def get_typed_round_trip_rows():
+    return [[None if x == '' else x for x in row] for row in TYPED_ROWS[1:]]
+
+
+def load_npy(path):
+    np = pytest.importorskip('numpy')
+    with open(os.path.join(path, 'columns.json')) as f:
+        manifest = json.load(f)
+    columns = []
+    for column in manifest:
+        values = np.load(os.path.join(path, column['file'])).tolist()
+        if column['type'] == 'str':
+            categories = np.load(
+                os.path.join(path, column['categories_file'])).tolist()
+            values = [categories[x] if x >= 0 else None for x in values]
+        if 'mask_file' in column:
+            mask = np.load(os.path.join(path, column['mask_file'])).tolist()
+            values = [None if x else value for value, x in zip(values, mask)]
+        columns.append(values)
+
+    return [x['name'] for x in manifest], [list(x) for x in zip(*columns)]
+
+
+def test_save_npy_round_trip(tmp_path):
+    path = str(tmp_path / 'output')
+    pytest.importorskip('numpy')
+    save_npy(TYPED_ROWS, path)
+
+    assert load_npy(path) == (TYPED_ROWS[0], get_typed_round_trip_rows())
+
+
+@pytest.mark.parametrize('save, module', [
+    (save_parquet, 'pyarrow.parquet'), (save_feather, 'pyarrow.feather')])
+def test_save_arrow_round_trip(tmp_path, save, module):
+    read_table = pytest.importorskip(module).read_table
+    path = str(tmp_path / 'output')
+    save(TYPED_ROWS, path)
+    table = read_table(path)
+
+    assert table.column_names == TYPED_ROWS[0]
+    assert [str(x) for x in table.schema.types] \
+        == ['date32[day]', 'string', 'int16', 'int64', 'string']
+    assert [list(x.values()) for x in table.to_pylist()] \
+        == get_typed_round_trip_rows()
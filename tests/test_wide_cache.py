@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+import wide_cache
+from utils import iter_csv, save_csv
+from wide_cache import load_wide_cache
+
+ROWS = [['Date', 'Person', 'A1_score'],
+        ['2020-01-01', 'Alice', '3'],
+        ['2020-01-01', 'Bob', ''],
+        ['2020-04-01', 'Alice', '4']]
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    pytest.importorskip('numpy')
+    builds = []
+    save_wide_cache = wide_cache.save_wide_cache
+    monkeypatch.setattr(
+        wide_cache, 'save_wide_cache',
+        lambda *args: builds.append(args) or save_wide_cache(*args))
+
+    return builds
+
+
+def load(tmp_path):
+    cache = load_wide_cache(str(tmp_path / 'input.csv'),
+                            str(tmp_path / 'cache'))
+    return list(cache.iter_rows())
+
+
+def test_cache_reused_while_input_unchanged(tmp_path, builds):
+    save_csv(ROWS, str(tmp_path / 'input.csv'))
+
+    assert load(tmp_path) == ROWS
+    assert load(tmp_path) == ROWS
+    assert len(builds) == 1
+
+
+@pytest.mark.parametrize('change', ['size', 'mtime', 'contents'])
+def test_cache_rebuilt_when_input_changes(tmp_path, builds, change):
+    path = str(tmp_path / 'input.csv')
+    save_csv(ROWS, path)
+    load(tmp_path)
+    stat = os.stat(path)
+    rows = [list(x) for x in ROWS]
+    if change == 'size':
+        rows.append(['2020-04-01', 'Bob', '5'])
+    elif change == 'contents':
+        rows[1][2] = '5'  # same size
+    save_csv(rows, path)
+    if change == 'contents':
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    else:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert load(tmp_path) == list(iter_csv(path)) == rows
+    assert len(builds) == 2
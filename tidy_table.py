@@ -0,0 +1,168 @@
+"""Compact, dictionary-encoded in-memory tidy datasets
+
+A tidy dataset has one row per wide row and skill data field, and nearly
+every row repeats the same Date, Person, Scorer, Skill and SkillField
+values. As a list of Python lists, each row costs a list object of its own.
+A TidyTable instead stores each column as an `array.array` of small integer
+codes, plus a lookup table of the column's distinct values, i.e. 1 to 2
+bytes per cell for typical datasets.
+"""
+from array import array
+from typing import Any, Iterable, Iterator, List, Sequence
+
+# code typecodes, from smallest to largest
+CODE_TYPECODES: List[str] = ['B', 'H', 'I', 'Q']
+
+
+class Categories(dict):
+    """Codes by value, each value assigned the next code on first use
+
+    Attributes:
+        values (list): Distinct values, in code order
+    """
+
+    def __init__(self):
+        """Create empty lookup table"""
+        super().__init__()
+        self.values: List[Any] = []
+
+    def __missing__(self, value: Any) -> int:
+        code: int = len(self.values)
+        self[value] = code
+        self.values.append(value)
+
+        return code
+
+
+class TidyTable:
+    """Columnar tidy dataset, with every column dictionary encoded
+
+    Iterating over a table yields its header, then each row decoded as a
+    list, so a table can be used wherever a 2d array including header is
+    expected, e.g. by `utils.save_dataset` or `tidy_to_skill.transform`.
+    Each column's codes start as unsigned bytes, and are widened once the
+    column has more distinct values than fit. Codes can be viewed with NumPy
+    without copying, e.g. `numpy.frombuffer(table.codes('Person'), dtype=
+    table.codes('Person').typecode)`.
+
+    Attributes:
+        header (list): Field names, in column order
+        categories (list): Categories of each column
+    """
+
+    def __init__(self, header: Sequence[str]):
+        """Create empty table
+
+        Args:
+            header (list): Field names, in column order
+        """
+        self.header: List[str] = list(header)
+        self.categories: List[Categories] = [Categories() for _ in header]
+        self._codes: List[array] = [array(CODE_TYPECODES[0]) for _ in header]
+
+    def __len__(self) -> int:
+        return len(self._codes[0])
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        yield self.header
+        yield from self.iter_rows()
+
+    def column_index(self, field: str) -> int:
+        """Get index of a column
+
+        Args:
+            field (str): Field name
+
+        Returns:
+            int: Column index
+        """
+        return self.header.index(field)
+
+    def codes(self, field: str) -> array:
+        """Get codes of a column
+
+        Args:
+            field (str): Field name
+
+        Returns:
+            array: Code of each row's value
+        """
+        return self._codes[self.column_index(field)]
+
+    def values(self, field: str) -> List[Any]:
+        """Get lookup table of a column
+
+        Args:
+            field (str): Field name
+
+        Returns:
+            list: Distinct values, indexed by code
+        """
+        return self.categories[self.column_index(field)].values
+
+    def column(self, field: str) -> List[Any]:
+        """Get decoded values of a column
+
+        Args:
+            field (str): Field name
+
+        Returns:
+            list: Value of each row
+        """
+        lookup: List[Any] = self.values(field)
+        return [lookup[x] for x in self.codes(field)]
+
+    def extend_codes(self, column_idx: int, codes: Sequence[int]):
+        """Append codes to a column, widening its codes if needed
+
+        Codes must have been assigned by the column's categories.
+
+        Args:
+            column_idx (int): Column index
+            codes (list): Codes, as a list or an array
+        """
+        column_codes: array = self._codes[column_idx]
+        while len(self.categories[column_idx]) > \
+                2 ** (8 * column_codes.itemsize):
+            column_codes = array(
+                CODE_TYPECODES[CODE_TYPECODES.index(column_codes.typecode)
+                               + 1],
+                column_codes)
+            self._codes[column_idx] = column_codes
+        column_codes.extend(codes)
+
+    def extend(self, rows: Iterable[Sequence[Any]]):
+        """Append rows
+
+        Args:
+            rows (iter): Rows, not including header
+        """
+        rows = list(rows)
+        for idx, column in enumerate(zip(*rows)):
+            self.extend_codes(
+                idx, list(map(self.categories[idx].__getitem__, column)))
+
+    def iter_rows(
+        self,
+        field: str = None,
+        keep: Iterable[Any] = None,
+    ) -> Iterator[List[Any]]:
+        """Decode rows
+
+        Args:
+            field (str): Field to filter rows by, if any
+            keep (iter): Values of field to keep rows of. Rows are filtered
+            by code, so other rows are never decoded.
+
+        Returns:
+            iter: Rows as lists, not including header
+        """
+        lookups: List[List[Any]] = [x.values for x in self.categories]
+        rows: Iterator[Sequence[int]] = zip(*self._codes)
+        if field is not None:
+            column_idx: int = self.column_index(field)
+            categories: Categories = self.categories[column_idx]
+            keep_codes = {categories[x] for x in keep if x in categories}
+            rows = (x for x in rows if x[column_idx] in keep_codes)
+        for row_codes in rows:
+            yield [lookup[x] for lookup, x in zip(lookups, row_codes)]
@@ -1,9 +1,16 @@
 """Convert tidy data format to data by skill"""
-from datetime import date
-from typing import Dict, Any, List, Union
+import argparse
+from operator import itemgetter
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Set, \
+    Tuple, Union
 
 from config import NO_SCORER_SKILL_FIELDS
-from utils import save_csv
+from instrumentation import add_profile_arguments, iter_stage, \
+    run_profiled, stage
+from schema import Schema, get_schema
+from tidy_table import TidyTable
+from utils import PARTITION_ROWS_PER_PART, add_input_sheet_argument, \
+    add_output_arguments, add_prefetch_argument, iter_dataset, save_dataset
 
 
 HEADER: List[str] = \
@@ -13,112 +20,215 @@ SKILL_FIELD_MAPPING: Dict[str, str] = {
     'current_capacity': 'Current Capacity',
     'targeted_capacity': 'Targeted Capacity',
 }
+SCORER_SKILL_FIELD_MAPPING: Dict[str, str] = {
+    'relevancy': 'Relevancy',
+    'priority': 'Priority',
+    'score': 'Score',
+    'notes': 'Notes',
+}
+SCORER_HEADER: List[str] = \
+    ['Skill', 'Date', 'Person', 'Scorer'] + VALUE_FIELDS \
+    + list(SCORER_SKILL_FIELD_MAPPING.values())
 CONFIG: Dict[str, Any] = {
+    'input_file_path': './input.csv',
     'output_file_path': './output.csv',
+    'output_format': 'csv',
+    'output_compression': 'none',
+    'output_partition_by': None,
+    'output_rows_per_part': PARTITION_ROWS_PER_PART,
+    'input_sheet_name': 'data',
+    'input_prefetch': False,
+    'output_sheet_name': 'data_by_skill',
     'include_scorer_skills': False
 }
 
 
 def transform(
-    source: List[List[Any]],
+    source: Iterable[List[Any]],
     include_scorer_skills: bool = False
 ) -> List[List[Any]]:
     """Transform dataset from tidy to PMA TCB specific skill dataset
 
+    Rows are grouped in one pass, by (Skill, Date, Person) for capacities,
+    and also by Scorer for scorer skill fields. Within a group, the first
+    row of each skill field is kept, e.g. the first scorer's capacities.
+    Only the grouped result is sorted. A normalized tidy dataset, see
+    `personnel_to_tidy.tidy_up`, has only that row of each capacity, so
+    there are no repeats to read and skip.
+
     Args:
-        source (list): Source dataset
+        source (iter): Source dataset, including header. Can be a list, an
+        iterator such as `personnel_to_tidy.tidy_up` output, or a TidyTable.
+        Unless including scorer skills, only capacity rows are read, and
+        only they are decoded from a TidyTable.
         include_scorer_skills (bool): Include PMA TCB specific skills which
         represent skills which are given by a specific person who is scoring
-        a learner personnel's skill capacity?
-
-    TODOs:
-        - Implement inclusion of scorer skills as variable export dataset.
+        a learner personnel's skill capacity? If so, there is a row per
+        (Skill, Date, Person, Scorer), with SCORER_HEADER fields, in order of
+        first appearance of each scorer.
 
     Returns:
         list: Transformed dataset
     """
-    transformed: List[List[Any]] = []
-    source_header: List[str] = source[0]
-
-    # Sort source
-    source_data_sorted = sorted(source[1:], key=lambda x: (
-        x[source_header.index('Skill')],
-        x[source_header.index('Date')],
-        x[source_header.index('Person')],))
-
-    # Transform
-    header: List[str] = HEADER
-    current_entry: List[Any] = []
-    for row in source_data_sorted:
-        # avoid repeats
-        last_entry_composite_key: List[Any] = \
-            None if transformed == [] else \
-            [transformed[-1][header.index('Skill')],
-             transformed[-1][header.index('Date')],
-             transformed[-1][header.index('Person')]]
-        this_entry_composite_key: List[Any] = \
-            [row[source_header.index('Skill')],
-             row[source_header.index('Date')],
-             row[source_header.index('Person')]]
-        if last_entry_composite_key == this_entry_composite_key:
+    source_rows: Iterator[List[Any]]
+    source_header: List[str]
+    if isinstance(source, TidyTable):
+        source_header = source.header
+        source_rows = source.iter_rows() if include_scorer_skills \
+            else source.iter_rows('SkillField', NO_SCORER_SKILL_FIELDS)
+    else:
+        source_rows = iter(source)
+        source_header = next(source_rows)
+    source_schema: Schema = get_schema(source_header)
+    src_scorer_idx, src_skill_field_idx, src_value_idx = \
+        source_schema.indices('Scorer', 'SkillField', 'Value')
+    source_key: Callable = source_schema.getter('Skill', 'Date', 'Person')
+
+    # Group: value slots of each group, by skill field
+    capacity_slots: Dict[str, int] = {
+        x: i for i, x in enumerate(SKILL_FIELD_MAPPING)}
+    scorer_slots: Dict[str, int] = {
+        x: i for i, x in enumerate(SCORER_SKILL_FIELD_MAPPING)}
+    capacities: Dict[Tuple[Any, ...], List[Any]] = {}
+    scorer_values: Dict[Tuple[Any, ...], List[Any]] = {}
+    for row in source_rows:
+        skill_field: str = row[src_skill_field_idx]
+        if skill_field in capacity_slots:
+            groups: Dict[Tuple[Any, ...], List[Any]] = capacities
+            group_key: Tuple[Any, ...] = source_key(row)
+            slot: int = capacity_slots[skill_field]
+        elif include_scorer_skills and skill_field in scorer_slots:
+            groups: Dict[Tuple[Any, ...], List[Any]] = scorer_values
+            group_key: Tuple[Any, ...] = \
+                source_key(row) + (row[src_scorer_idx],)
+            slot: int = scorer_slots[skill_field]
+        else:
             continue
+        values: List[Any] = groups.get(group_key)
+        if values is None:
+            values = groups[group_key] = [None] * len(
+                capacity_slots if groups is capacities else scorer_slots)
+        if values[slot] is None:
+            value: Union[int, str] = row[src_value_idx]
+            values[slot] = value if value is not None \
+                else ''  # substitution for 'None' for disambiguation
 
-        if not current_entry:
-            current_entry: List[Any] = [None for _ in range(len(header))]
-            current_entry[header.index('Skill')]: str \
-                = row[source_header.index('Skill')]
-            current_entry[header.index('Date')]: date \
-                = row[source_header.index('Date')]
-            current_entry[header.index('Person')]: str \
-                = row[source_header.index('Person')]
-
-        skill_field: str = row[source_header.index('SkillField')]
-        if skill_field not in NO_SCORER_SKILL_FIELDS:
-            if not include_scorer_skills:
-                continue
-            pass  # edit from here in future if these fields needed
-
-        target_value_field: str = SKILL_FIELD_MAPPING[skill_field]
-        current_entry[header.index(target_value_field)]: Union[int, str] = \
-            row[source_header.index('Value')] if \
-            row[source_header.index('Value')] is not None \
-            else ''  # substitution for 'None' for disambiguation
-
-        values: List[Union[int, str]] = \
-            [current_entry[header.index(x)] for x in VALUE_FIELDS]
-        if None in values:
-            continue
-        else:
-            transformed.append(current_entry)
-            current_entry = []
+    # Transform
+    header: List[str] = SCORER_HEADER if include_scorer_skills else HEADER
+    header_schema: Schema = get_schema(header)
+    key_indices: List[int] = header_schema.indices('Skill', 'Date', 'Person')
+    capacity_indices: List[int] = \
+        header_schema.indices(*SKILL_FIELD_MAPPING.values())
+    missing_capacities: List[str] = [''] * len(capacity_indices)
+    transformed: List[List[Any]] = []
 
-    # Sort result
-    transformed = sorted(transformed, key=lambda x: (
-        x[HEADER.index('Skill')],
-        x[HEADER.index('Date')],
-        x[HEADER.index('Person')]))
+    def new_entry(
+        group_key: Tuple[Any, ...],
+        capacity_values: List[Any],
+    ) -> List[Any]:
+        entry: List[Any] = [None] * len(header)
+        for idx, value in zip(key_indices, group_key):
+            entry[idx] = value
+        for idx, value in zip(capacity_indices, capacity_values):
+            entry[idx] = '' if value is None else value
+        return entry
+
+    if include_scorer_skills:
+        scorer_idx: int = header_schema.index['Scorer']
+        scorer_value_indices: List[int] = \
+            header_schema.indices(*SCORER_SKILL_FIELD_MAPPING.values())
+        scored_keys: Set[Tuple[Any, ...]] = set()
+        for group_key, values in scorer_values.items():
+            capacity_key: Tuple[Any, ...] = group_key[:-1]
+            scored_keys.add(capacity_key)
+            entry: List[Any] = new_entry(
+                capacity_key,
+                capacities.get(capacity_key, missing_capacities))
+            entry[scorer_idx] = group_key[-1]
+            for idx, value in zip(scorer_value_indices, values):
+                entry[idx] = '' if value is None else value
+            transformed.append(entry)
+        capacities = {k: v for k, v in capacities.items()
+                      if k not in scored_keys}
+    transformed.extend(new_entry(group_key, values)
+                       for group_key, values in capacities.items())
+
+    # Sort result. Sort is stable, so scorers stay in order of appearance.
+    transformed.sort(key=itemgetter(*key_indices))
 
     return [header] + transformed
 
 
 def run(
-    dataset: List[List[Any]] = None,
+    dataset: Iterable[List[Any]] = None,
     config: Dict = CONFIG,
 ):
     """Run the module.
 
     Args:
         config (dict): Dictionary containing configuration options.
-        dataset (list): Source dataset to transform and save
+        dataset (iter): Source dataset to transform and save. If not passed,
+        a tidy dataset CSV is read from config['input_file_path'].
+    """
+    if dataset is None:
+        dataset = iter_stage('load', iter_dataset(
+            config['input_file_path'], config['input_sheet_name'],
+            prefetch=config['input_prefetch']))
+    with stage('transform') as record:
+        transformed: List[List[Any]] = transform(
+            source=dataset,
+            include_scorer_skills=config['include_scorer_skills'],)
+        record.rows += len(transformed) - 1
+    with stage('save'):
+        output_path: str = save_dataset(
+            array=transformed,
+            path=config['output_file_path'],
+            output_format=config['output_format'],
+            compression=config['output_compression'],
+            sheet_name=config['output_sheet_name'],
+            partition_by=config['output_partition_by'],
+            rows_per_part=config['output_rows_per_part'])
+    print('Saved to: ' + output_path)
+
+
+def add_scorer_skills_argument(
+    parser: argparse.ArgumentParser,
+    config: Dict[str, Any],
+):
+    """Add include scorer skills option to a command line parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+        config (dict): Configuration, for 'include_scorer_skills' default
+    """
+    parser.add_argument(
+        '--include-scorer-skills', dest='include_scorer_skills',
+        action='store_true', default=config['include_scorer_skills'],
+        help='Include relevancy, priority, score and notes, with a row per '
+             'scorer')
+
+
+def main(argv: List[str] = None):
+    """Command line entry point
+
+    Args:
+        argv (list): Command line arguments. Defaults to sys.argv.
     """
-    transformed: List[List[Any]] = transform(
-        source=dataset,
-        include_scorer_skills=config['include_scorer_skills'],)
-    save_csv(
-        array=transformed,
-        path=config['output_file_path'])
-    print('Saved to: ' + config['output_file_path'])
+    parser = argparse.ArgumentParser(
+        description='Convert tidy dataset to skill dataset')
+    parser.add_argument(
+        '-i', '--input', dest='input_file_path', metavar='PATH',
+        default=CONFIG['input_file_path'],
+        help='Path to tidy dataset CSV, Excel workbook, or partitioned '
+             'dataset directory (default: %(default)s)')
+    add_input_sheet_argument(parser, CONFIG)
+    add_prefetch_argument(parser, CONFIG)
+    add_scorer_skills_argument(parser, CONFIG)
+    add_output_arguments(parser, CONFIG)
+    add_profile_arguments(parser)
+    args: argparse.Namespace = parser.parse_args(argv)
+    run_profiled(run, args, None, {**CONFIG, **vars(args)})
 
 
 if __name__ == '__main__':
-    run()
+    main()
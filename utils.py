@@ -1,37 +1,1369 @@
 """Package utils."""
 import csv
+import importlib
+import io
+import json
+import os
+from collections import OrderedDict
+from datetime import date, datetime
+from itertools import islice
+from types import ModuleType
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, \
+    Any, Optional, Tuple
 
-from typing import List, Any
+OUTPUT_FORMATS: List[str] = \
+    ['csv', 'parquet', 'feather', 'npy', 'xlsx', 'sqlite']
+OUTPUT_FORMAT_EXTENSIONS: Dict[str, str] = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'npy': '',  # a directory of .npy files
+    'xlsx': '.xlsx',
+    'sqlite': '.sqlite',
+}
+# Formats which take column names, and types, from the header row
+HEADER_OUTPUT_FORMATS: List[str] = ['parquet', 'feather', 'npy', 'sqlite']
+WORKBOOK_EXTENSIONS: Tuple[str, ...] = ('.xlsx', '.xlsm')
+XLSX_MAX_ROWS: int = 1048576
+XLSX_MAX_COLUMNS: int = 16384
+XLSX_SHEET_NAME: str = 'data'
+CSV_COMPRESSIONS: List[str] = ['none', 'gzip', 'zstd']
+CSV_COMPRESSION_EXTENSIONS: Dict[str, str] = {
+    'none': '',
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+CSV_LINE_TERMINATOR: str = '\r\n'  # as csv.writer
+CSV_BUFFER_ROWS: int = 10000
+CSV_ENCODING_CACHE_SIZE: int = 100000
+# Types of values encoded through CsvEncodingCache. No value of one equals a
+# value of another, unlike e.g. 1, 1.0 and True.
+CSV_CACHED_TYPES: FrozenSet[type] = frozenset([str, int, date, type(None)])
+PART_FILE_PREFIX: str = 'part-'
+PART_FILE_NAME: str = PART_FILE_PREFIX + '{:04d}.csv'
+PARTITION_ROWS_PER_PART: int = 100000
+PARTITION_BUFFER_ROWS: int = 1000
+PARTITION_MAX_OPEN: int = 32
+PARTITION_NULL_VALUE: str = '__HIVE_DEFAULT_PARTITION__'  # as Hive
+WRITE_QUEUE_CHUNKS: int = 4
+PREFETCH_BATCH_ROWS: int = 1000
+PREFETCH_QUEUE_BATCHES: int = 8
+TAIL_BLOCK_BYTES: int = 1 << 20
+SQLITE_BATCH_ROWS: int = 10000
+# safe as the database is written to a new file, and discarded if it fails
+SQLITE_PRAGMAS: List[str] = [
+    'journal_mode = OFF', 'synchronous = OFF', 'locking_mode = EXCLUSIVE',
+    'temp_store = MEMORY', 'cache_size = -65536']
+# indexes created on tables which have all of their fields
+SQLITE_INDEXES: List[Tuple[str, ...]] = [
+    ('Date', 'Person'), ('Skill', 'Date', 'Person'), ('Person', 'Skill')]
 
 
-def load_csv(path) -> List[List[str]]:
+def get_csv_compression(path: str) -> str:
+    """Get compression of a CSV file from its extension
+
+    Args:
+        path (str): Path to file
+
+    Returns:
+        str: One of CSV_COMPRESSIONS
+    """
+    for compression, extension in CSV_COMPRESSION_EXTENSIONS.items():
+        if extension and path.lower().endswith(extension):
+            return compression
+
+    return 'none'
+
+
+def open_csv(path: str) -> Any:
+    """Open a CSV file for reading, decompressing .gz and .zst files
+
+    Args:
+        path (str): Path to file to open
+
+    Raises:
+        ImportError: If file is zstd compressed, and zstandard is not
+        installed
+
+    Returns:
+        file: Text file object
+    """
+    compression: str = get_csv_compression(path)
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'rt')
+    if compression == 'zstd':
+        zstandard = import_optional('zstandard')
+        if zstandard is None:
+            raise ImportError('zstandard is required to read .zst files.')
+        return io.TextIOWrapper(
+            zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')))
+
+    return open(path, 'r')
+
+
+def iter_prefetched(
+    rows: Iterable[Any],
+    batch_rows: int = PREFETCH_BATCH_ROWS,
+    max_batches: int = PREFETCH_QUEUE_BATCHES,
+) -> Iterator[Any]:
+    """Produce rows on a background thread, ahead of consuming them
+
+    Rows are passed from the thread in batches, through a queue of at most
+    max_batches batches, so that producing rows, e.g. reading a file,
+    overlaps with consuming them without reading ahead more than that. The
+    thread waits while the queue is full. Errors raised producing rows are
+    raised when consuming them.
+
+    Args:
+        rows (iter): Rows to produce, e.g. rows of a file
+        batch_rows (int): Rows per batch
+        max_batches (int): Max batches produced but not yet consumed
+
+    Returns:
+        iter: Same rows
+    """
+    # imported here, as are other modules only some runs need, so that
+    # entry points start fast
+    import queue
+    import threading
+
+    batches: queue.Queue = queue.Queue(maxsize=max_batches)
+    stopped = threading.Event()
+    end = object()
+
+    def put(item: Any) -> bool:
+        while not stopped.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            batch: List[Any] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_rows:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(end)
+        except BaseException as error:
+            put(error)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item: Any = batches.get()
+            if item is end:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+    finally:
+        stopped.set()  # if not all rows were consumed
+        thread.join()
+
+
+def load_csv(path, prefetch: bool = False) -> List[List[str]]:
     """Load csv
 
     Args:
         path (str): Path to file to load
+        prefetch (bool): Read the file on a background thread? See
+        `iter_prefetched`.
 
     Returns:
         list: 2d array representing file
     """
-    with open(path, 'r') as f:
-        dataset: List[List[str]] = [x for x in csv.reader(f)]
+    with open_csv(path) as f:
+        rows: Iterable[List[str]] = csv.reader(f)
+        if prefetch:
+            rows = iter_prefetched(rows)
+        dataset: List[List[str]] = [x for x in rows]
 
     return dataset
 
 
+def iter_csv(path, prefetch: bool = False) -> Iterator[List[str]]:
+    """Stream csv rows, without loading the whole file
+
+    Args:
+        path (str): Path to file to load
+        prefetch (bool): Read the file on a background thread? See
+        `iter_prefetched`.
+
+    Returns:
+        iter: Rows of file
+    """
+    with open_csv(path) as f:
+        rows: Iterable[List[str]] = csv.reader(f)
+        if prefetch:
+            rows = iter_prefetched(rows)
+        yield from rows
+
+
+def iter_csv_reversed(
+    path: str,
+    block_bytes: int = TAIL_BLOCK_BYTES,
+) -> Iterator[List[str]]:
+    """Stream csv rows from the end of the file backwards
+
+    The file is read backwards in blocks, only as far as rows are consumed,
+    so reading the last rows of a file does not depend on its size. Rows are
+    parsed one line at a time, so quoted fields must not contain line
+    breaks, as in datasets generated by this package.
+
+    Args:
+        path (str): Path to uncompressed CSV file
+        block_bytes (int): Bytes to read at a time
+
+    Raises:
+        ValueError: If file is compressed, so cannot be read backwards
+
+    Returns:
+        iter: Rows of file, last row first, including header
+    """
+    if get_csv_compression(path) != 'none':
+        raise ValueError('Cannot read a compressed file backwards: ' + path)
+
+    def parse(line: bytes) -> List[str]:
+        return next(csv.reader([line.decode('utf-8').rstrip('\r')]))
+
+    with open(path, 'rb') as f:
+        position: int = f.seek(0, os.SEEK_END)
+        remainder: bytes = b''
+        while position > 0:
+            size: int = min(block_bytes, position)
+            position -= size
+            f.seek(position)
+            lines: List[bytes] = (f.read(size) + remainder).split(b'\n')
+            remainder = lines.pop(0)  # may start before this block
+            for line in reversed(lines):
+                if line.rstrip(b'\r'):
+                    yield parse(line)
+        if remainder.rstrip(b'\r'):
+            yield parse(remainder)
+
+
+def is_workbook(path: str) -> bool:
+    """Is a file an Excel workbook, by its extension?
+
+    Args:
+        path (str): Path to file
+
+    Returns:
+        bool: Is workbook
+    """
+    return path.lower().endswith(WORKBOOK_EXTENSIONS)
+
+
+def _import_openpyxl() -> ModuleType:
+    openpyxl = import_optional('openpyxl')
+    if openpyxl is None:
+        raise ImportError('openpyxl is required to read or write Excel '
+                          'workbooks.')
+
+    return openpyxl
+
+
+def encode_xlsx_value(value: Any, date_format: str = '%Y-%m-%d') -> str:
+    """Encode a workbook cell value as a string, as in a CSV export
+
+    Args:
+        value: Cell value
+        date_format (str): Format of dates
+
+    Returns:
+        str: Value, or '' if empty
+    """
+    if value is None:
+        return ''
+    if isinstance(value, datetime):  # workbooks have no date-only cells
+        value = value.date()
+    if isinstance(value, date):
+        return value.strftime(date_format)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return str(value)
+
+
+def iter_xlsx(
+    path: str,
+    sheet_name: str = None,
+    date_format: str = '%Y-%m-%d',
+) -> Iterator[List[str]]:
+    """Stream rows of a workbook sheet, without loading the whole workbook
+
+    The workbook is opened in read-only mode, so memory use does not grow
+    with the size of the sheet. Cached values of formulas are read. Values
+    are strings, as in rows of the sheet's CSV export, so that rows can be
+    used wherever rows of `iter_csv` are. Rows with no values, e.g. unused
+    rows of a formula range, are skipped. Rows are padded to the width of
+    the first row, since sheets saved without dimensions, e.g. in
+    write-only mode, leave out trailing empty cells.
+
+    Args:
+        path (str): Path to workbook
+        sheet_name (str): Name of sheet to read. Defaults to the active
+        sheet.
+        date_format (str): Format of dates
+
+    Raises:
+        ImportError: If openpyxl is not installed
+        KeyError: If there is no such sheet
+
+    Returns:
+        iter: Rows of sheet
+    """
+    workbook = _import_openpyxl().load_workbook(
+        path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        width: int = 0
+        for row in sheet.iter_rows(values_only=True):
+            values: List[str] = \
+                [encode_xlsx_value(x, date_format) for x in row]
+            if not any(values):
+                continue
+            width = width or len(values)
+            if len(values) < width:
+                values.extend([''] * (width - len(values)))
+            yield values
+    finally:
+        workbook.close()
+
+
+def iter_partitioned(
+    path: str,
+    sheet_name: str = None,
+    date_format: str = '%Y-%m-%d',
+) -> Iterator[List[str]]:
+    """Stream rows of a partitioned dataset directory, as one dataset
+
+    Part files, named 'part-*', are read from every partition directory
+    under path, in order of path, e.g. 'date=2019-09-01/part-0000.csv', then
+    'date=2019-09-01/part-0001.csv', then 'date=2019-12-01/part-0000.csv'.
+    Each part has its own header row, which is only yielded once. Path can
+    also be a single partition's directory.
+
+    Args:
+        path (str): Path to dataset directory
+        sheet_name (str): Name of sheet to read, if parts are workbooks
+        date_format (str): Format of dates, if parts are workbooks
+
+    Raises:
+        ValueError: If there are no part files, or parts have different
+        headers
+
+    Returns:
+        iter: Rows of strings, including header
+    """
+    part_paths: List[str] = []
+    for dir_path, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        part_names: List[str] = \
+            [x for x in file_names if x.startswith(PART_FILE_PREFIX)]
+        part_names.sort(key=lambda x: (len(x), x))  # part-9999, part-10000
+        part_paths.extend(os.path.join(dir_path, x) for x in part_names)
+    if not part_paths:
+        raise ValueError('No part files found in: ' + path)
+
+    header: Optional[List[str]] = None
+    for part_path in part_paths:
+        rows: Iterator[List[str]] = \
+            iter_dataset(part_path, sheet_name, date_format)
+        part_header: Optional[List[str]] = next(rows, None)
+        if header is None:
+            header = part_header
+            yield header
+        elif part_header != header:
+            raise ValueError('Header of {} differs from that of {}'.format(
+                part_path, part_paths[0]))
+        yield from rows
+
+
+def iter_dataset(
+    path: str,
+    sheet_name: str = None,
+    date_format: str = '%Y-%m-%d',
+    prefetch: bool = False,
+) -> Iterator[List[str]]:
+    """Stream rows of a CSV file, of a workbook sheet, or of a partitioned
+    dataset directory
+
+    Args:
+        path (str): Path to CSV file, possibly compressed, to workbook, or to
+        partitioned dataset directory, see `iter_partitioned`
+        sheet_name (str): Name of sheet to read, if a workbook. Defaults to
+        the active sheet.
+        date_format (str): Format of dates, if a workbook
+        prefetch (bool): Read on a background thread? See
+        `iter_prefetched`.
+
+    Returns:
+        iter: Rows of strings
+    """
+    rows: Iterator[List[str]]
+    if os.path.isdir(path):
+        rows = iter_partitioned(path, sheet_name, date_format)
+    elif is_workbook(path):
+        rows = iter_xlsx(path, sheet_name, date_format)
+    else:
+        rows = iter_csv(path)
+
+    return iter_prefetched(rows) if prefetch else rows
+
+
+def encode_csv_value(value: Any) -> str:
+    """Encode a value as a CSV field, as csv.writer does by default
+
+    None is an empty field. Fields containing a comma, quote or line break
+    are quoted, with quotes doubled.
+
+    Args:
+        value: Value to encode
+
+    Returns:
+        str: CSV field
+    """
+    if value is None:
+        return ''
+    text: str = value if isinstance(value, str) else str(value)
+    if ',' in text or '"' in text or '\r' in text or '\n' in text:
+        return '"' + text.replace('"', '""') + '"'
+
+    return text
+
+
+class CsvEncodingCache(dict):
+    """CSV fields by value, each encoded on first use
+
+    Datasets repeat a few distinct values, e.g. dates, small ints, notes and
+    empty cells, millions of times, so a lookup is much cheaper than encoding
+    every cell. Once the cache holds `max_size` values, new values are
+    encoded without being cached.
+
+    Values which are equal across types, e.g. 1, 1.0 and True, would share
+    one entry, so only look up values of CSV_CACHED_TYPES.
+    """
+
+    def __init__(self, max_size: int = CSV_ENCODING_CACHE_SIZE):
+        """Create empty cache
+
+        Args:
+            max_size (int): Maximum number of values to cache
+        """
+        super().__init__()
+        self.max_size: int = max_size
+
+    def __missing__(self, value: Any) -> str:
+        encoded: str = encode_csv_value(value)
+        if len(self) < self.max_size:
+            self[value] = encoded
+
+        return encoded
+
+
+def iter_csv_chunks(
+    array: Iterable[List[Any]],
+    buffer_rows: int = CSV_BUFFER_ROWS,
+    cache: CsvEncodingCache = None,
+) -> Iterator[str]:
+    """Encode 2d array as chunks of CSV text
+
+    Output is the same as csv.writer's default dialect. Rows whose values
+    are all of CSV_CACHED_TYPES, as dataset rows are, are encoded through
+    the cache. Other rows, e.g. with floats or bools, are encoded value by
+    value.
+
+    Args:
+        array (iter): 2d array, or an iterator of rows
+        buffer_rows (int): Rows per chunk
+        cache (CsvEncodingCache): Cache to encode with, e.g. to share it
+        across files. Defaults to a new cache.
+
+    Returns:
+        iter: CSV text, each chunk ending with a line terminator
+    """
+    if cache is None:
+        cache = CsvEncodingCache()
+    encode: Callable = cache.__getitem__
+    lines: List[str] = []
+    for row in array:
+        if set(map(type, row)) <= CSV_CACHED_TYPES:
+            line: str = ','.join(map(encode, row))
+        else:
+            line: str = ','.join(map(encode_csv_value, row))
+        if not line and row:
+            line = '""'  # as csv.writer, so the row is not read as empty
+        lines.append(line)
+        if len(lines) >= buffer_rows:
+            lines.append('')
+            yield CSV_LINE_TERMINATOR.join(lines)
+            lines = []
+    if lines:
+        lines.append('')
+        yield CSV_LINE_TERMINATOR.join(lines)
+
+
+def open_csv_output(path: str, compression: str = 'none') -> Any:
+    """Open a binary file for writing, compressing what is written
+
+    Args:
+        path (str): Path to file to open
+        compression (str): One of CSV_COMPRESSIONS
+
+    Raises:
+        ImportError: If compression is 'zstd', and zstandard is not installed
+        ValueError: If compression is unknown
+
+    Returns:
+        file: Binary file object
+    """
+    if compression == 'none':
+        return open(path, 'wb')
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'wb', compresslevel=6)
+    if compression == 'zstd':
+        zstandard = import_optional('zstandard')
+        if zstandard is None:
+            raise ImportError('zstandard is required to save .zst files.')
+        return zstandard.ZstdCompressor().stream_writer(open(path, 'wb'))
+    raise ValueError('Unknown compression "{}". Expected one of: {}'
+                     .format(compression, ', '.join(CSV_COMPRESSIONS)))
+
+
+class BackgroundWriter:
+    """Binary file wrapper which writes, and so compresses, on a background
+    thread
+
+    Written chunks are passed to the thread through a queue of at most
+    max_chunks chunks, so that producing and encoding rows overlaps with
+    writing them to disk. Writes wait while the queue is full, so memory use
+    stays bounded when the disk is slower than the producer. An error raised
+    writing is raised by the next write, or on close.
+    """
+
+    def __init__(
+        self,
+        file: Any,
+        max_chunks: int = WRITE_QUEUE_CHUNKS,
+    ):
+        """Start writer thread
+
+        Args:
+            file (file): Binary file object to write to. Closed on close.
+            max_chunks (int): Max chunks written but not yet on disk
+        """
+        self.file: Any = file
+        import queue
+        import threading
+
+        self.error: Optional[BaseException] = None
+        self._chunks: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def _write(self):
+        while True:
+            chunk: Optional[bytes] = self._chunks.get()
+            if chunk is None:
+                return
+            if self.error is None:  # else discard, so writes don't block
+                try:
+                    self.file.write(chunk)
+                except BaseException as error:
+                    self.error = error
+
+    def write(self, chunk: bytes):
+        """Queue a chunk to write
+
+        Args:
+            chunk (bytes): Data
+        """
+        if self.error is not None:
+            raise self.error
+        self._chunks.put(chunk)
+
+    def close(self):
+        """Wait for queued chunks to be written, and close file"""
+        self._chunks.put(None)
+        self._thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self) -> 'BackgroundWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 def save_csv(
-    array: List[List[Any]],
-    path: str
+    array: Iterable[List[Any]],
+    path: str,
+    compression: str = 'none',
+    background: bool = True,
 ):
     """Creates a CSV str from 2d array.
 
+    Each distinct value is encoded once, and rows are written in chunks of
+    CSV_BUFFER_ROWS, UTF-8 encoded. Output is the same as csv.writer's.
+
     Args:
-        array (list): 2d array
+        array (iter): 2d array, or an iterator of rows
         path (str): Path to save output file
+        compression (str): One of CSV_COMPRESSIONS
+        background (bool): Write and compress chunks on a background thread,
+        while the next chunk's rows are produced and encoded? See
+        `BackgroundWriter`.
 
     Side effects:
         - Saves CSV file
     """
-    with open(path, 'w+') as f:
-        writer = csv.writer(f, delimiter=',')
-        writer.writerows(array)
+    f: Any = open_csv_output(path, compression)
+    if background:
+        f = BackgroundWriter(f)
+    with f:
+        for chunk in iter_csv_chunks(array):
+            f.write(chunk.encode('utf-8'))
+
+
+def append_csv(
+    array: Iterable[List[Any]],
+    path: str,
+):
+    """Append rows to an uncompressed CSV file
+
+    Output is the same as if the rows had been saved with the file's other
+    rows by `save_csv`.
+
+    Args:
+        array (iter): 2d array, or an iterator of rows, not including header
+        path (str): Path to CSV file
+
+    Side effects:
+        - Appends to CSV file
+    """
+    with open(path, 'ab+') as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':  # last row has no line terminator
+                f.write(CSV_LINE_TERMINATOR.encode('utf-8'))
+        for chunk in iter_csv_chunks(array):
+            f.write(chunk.encode('utf-8'))
+
+
+def get_typed_columns(
+    array: Iterable[List[Any]],
+) -> Tuple[List[str], List[str], List[List[Any]]]:
+    """Split 2d array into typed columns
+
+    Each column's type is inferred from its values: 'date' if all values are
+    dates, 'int' if all are ints, and 'str' otherwise. Empty strings and None
+    are nulls, and do not count towards a column's type.
+
+    Args:
+        array (iter): 2d array, including header
+
+    Returns:
+        tuple: Header, column types, and values of each column, with nulls
+        as None
+    """
+    rows: Iterator[List[Any]] = iter(array)
+    header: List[str] = list(next(rows))
+    columns: List[List[Any]] = [list(x) for x in zip(*rows)] \
+        or [[] for _ in header]
+
+    column_types: List[str] = []
+    for idx, values in enumerate(columns):
+        value_types = {type(x) for x in values if x is not None and x != ''}
+        if value_types and value_types <= {date}:
+            column_type: str = 'date'
+        elif value_types and value_types <= {int}:
+            column_type: str = 'int'
+        else:
+            column_type: str = 'str'
+        if column_type != 'str':
+            columns[idx] = [None if x == '' else x for x in values]
+        else:
+            columns[idx] = \
+                [None if x is None or x == '' else str(x) for x in values]
+        column_types.append(column_type)
+
+    return header, column_types, columns
+
+
+def get_int_bounds_type(values: List[Optional[int]]) -> str:
+    """Get the smallest signed integer type name which fits the values
+
+    Args:
+        values (list): Integers or None
+
+    Returns:
+        str: 'int8', 'int16', 'int32' or 'int64'
+    """
+    non_null: List[int] = [x for x in values if x is not None]
+    low: int = min(non_null, default=0)
+    high: int = max(non_null, default=0)
+    for bits in (8, 16, 32):
+        if -2 ** (bits - 1) <= low and high < 2 ** (bits - 1):
+            return 'int{}'.format(bits)
+
+    return 'int64'
+
+
+def _get_arrow_table(array: Iterable[List[Any]]) -> Any:
+    """Create a typed pyarrow table from 2d array
+
+    Args:
+        array (iter): 2d array, including header
+
+    Returns:
+        pyarrow.Table: Table
+    """
+    pa = import_optional('pyarrow')
+    if pa is None:
+        raise ImportError('pyarrow is required to save Parquet or Feather.')
+    header, column_types, columns = get_typed_columns(array)
+    arrow_types: Dict[str, Callable] = {
+        'date': lambda values: pa.date32(),
+        'int': lambda values: getattr(pa, get_int_bounds_type(values))(),
+        'str': lambda values: pa.string()}
+    arrays: List[Any] = [
+        pa.array(values, type=arrow_types[column_type](values))
+        for column_type, values in zip(column_types, columns)]
+
+    return pa.Table.from_arrays(arrays, names=header)
+
+
+def save_parquet(
+    array: Iterable[List[Any]],
+    path: str
+):
+    """Save 2d array as a typed Parquet file. Requires pyarrow.
+
+    Args:
+        array (iter): 2d array, including header
+        path (str): Path to save output file
+
+    Side effects:
+        - Saves Parquet file
+    """
+    import_optional('pyarrow.parquet').write_table(
+        _get_arrow_table(array), path)
+
+
+def save_feather(
+    array: Iterable[List[Any]],
+    path: str
+):
+    """Save 2d array as a typed Feather file. Requires pyarrow.
+
+    Args:
+        array (iter): 2d array, including header
+        path (str): Path to save output file
+
+    Side effects:
+        - Saves Feather file
+    """
+    import_optional('pyarrow.feather').write_feather(
+        _get_arrow_table(array), path)
+
+
+def save_npy(
+    array: Iterable[List[Any]],
+    path: str
+):
+    """Save 2d array as a directory of typed, memory-mappable .npy columns
+
+    Each column is saved as '<index>.npy', and described in 'columns.json'.
+    Dates are saved as 'datetime64[D]', and ints as the smallest int type
+    which fits them. Int and date columns with nulls also get a
+    '<index>.mask.npy' of booleans, True where null. Strings are dictionary
+    encoded: '<index>.npy' holds int codes, -1 where null, into the fixed
+    width unicode values of '<index>.categories.npy'. Load a column with e.g.
+    `numpy.load(path, mmap_mode='r')`. Requires NumPy.
+
+    Args:
+        array (iter): 2d array, including header
+        path (str): Path to directory to save output files in
+
+    Side effects:
+        - Saves .npy files and a columns.json file
+    """
+    np = import_optional('numpy')
+    if np is None:
+        raise ImportError('NumPy is required to save .npy columns.')
+    header, column_types, columns = get_typed_columns(array)
+    os.makedirs(path, exist_ok=True)
+
+    manifest: List[Dict[str, Any]] = []
+    for idx, (name, column_type, values) in \
+            enumerate(zip(header, column_types, columns)):
+        mask: List[bool] = [x is None for x in values]
+        if column_type == 'date':
+            column = np.array(
+                [x if x is not None else date.min for x in values],
+                dtype='datetime64[D]')
+        elif column_type == 'int':
+            column = np.array(
+                [x if x is not None else 0 for x in values],
+                dtype=get_int_bounds_type(values))
+        else:
+            categories: List[str] = \
+                sorted({x for x in values if x is not None})
+            codes: Dict[str, int] = {x: i for i, x in enumerate(categories)}
+            column = np.array(
+                [codes[x] if x is not None else -1 for x in values],
+                dtype=get_int_bounds_type([-1, len(categories)]))
+            mask = []  # nulls are -1 codes
+        file_name: str = '{}.npy'.format(idx)
+        np.save(os.path.join(path, file_name), column)
+        column_info: Dict[str, Any] = {
+            'name': name, 'type': column_type, 'file': file_name}
+        if column_type == 'str':
+            column_info['categories_file'] = '{}.categories.npy'.format(idx)
+            np.save(os.path.join(path, column_info['categories_file']),
+                    np.array(categories, dtype=str))
+        if any(mask):
+            column_info['mask_file'] = '{}.mask.npy'.format(idx)
+            np.save(os.path.join(path, column_info['mask_file']),
+                    np.array(mask, dtype=bool))
+        manifest.append(column_info)
+
+    with open(os.path.join(path, 'columns.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def save_xlsx(
+    array: Iterable[List[Any]],
+    path: str,
+    sheet_name: str = XLSX_SHEET_NAME,
+):
+    """Save 2d array as the only sheet of a new Excel workbook
+
+    The workbook is written in write-only mode, streaming rows to disk, so
+    memory use does not grow with the number of rows. Write-only mode can
+    only create new workbooks, so the sheet cannot be written into an
+    existing workbook. Requires openpyxl.
+
+    Args:
+        array (iter): 2d array, or an iterator of rows
+        path (str): Path to save workbook
+        sheet_name (str): Name of sheet
+
+    Raises:
+        ImportError: If openpyxl is not installed
+        ValueError: If there are more rows or columns than a sheet can hold
+
+    Side effects:
+        - Saves workbook
+    """
+    workbook = _import_openpyxl().Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_name)
+    for idx, row in enumerate(array):
+        if idx == XLSX_MAX_ROWS:
+            raise ValueError('A sheet can hold at most {} rows. Use another '
+                             'output format.'.format(XLSX_MAX_ROWS))
+        if idx == 0 and len(row) > XLSX_MAX_COLUMNS:
+            raise ValueError('A sheet can hold at most {} columns.'
+                             .format(XLSX_MAX_COLUMNS))
+        sheet.append(row)
+    workbook.save(path)
+
+
+def quote_sql_name(name: str) -> str:
+    """Quote a table, column or index name for SQL
+
+    Args:
+        name (str): Name
+
+    Returns:
+        str: Quoted name
+    """
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def save_sqlite(
+    array: Iterable[List[Any]],
+    path: str,
+    table_name: str = XLSX_SHEET_NAME,
+):
+    """Save 2d array as the only table of a new, indexed SQLite database
+
+    Rows are streamed into the table in batches of SQLITE_BATCH_ROWS with
+    `executemany`, in a single transaction, with SQLITE_PRAGMAS for bulk
+    loading. The database is written to a temporary file, which replaces
+    path once complete. Then each of SQLITE_INDEXES whose fields are all in
+    the header is created, which is faster than updating them row by row.
+
+    Column types are inferred from the first batch: INTEGER if all values
+    are ints, TEXT if all are strings, or DATE if all are dates, saved as
+    'YYYY-MM-DD' text. Columns of mixed types, e.g. a tidy Value of scores
+    and notes, or of only nulls, are declared without a type, so each value
+    keeps its own. Empty strings are saved as NULL.
+
+    Args:
+        array (iter): 2d array, or an iterator of rows, including header
+        path (str): Path to save database
+        table_name (str): Name of table
+
+    Raises:
+        ValueError: If the first row is not a header of column names
+
+    Side effects:
+        - Saves database file
+    """
+    import sqlite3
+
+    rows: Iterator[List[Any]] = iter(array)
+    header: List[str] = list(next(rows))
+    if not all(isinstance(x, str) for x in header):
+        raise ValueError('SQLite output needs a header row of column names.')
+    batch: List[List[Any]] = list(islice(rows, SQLITE_BATCH_ROWS))
+    sql_types: Dict[Any, str] = {date: 'DATE', int: 'INTEGER', str: 'TEXT'}
+    column_types: List[str] = []
+    for idx in range(len(header)):
+        value_types = {type(x[idx]) for x in batch
+                       if x[idx] is not None and x[idx] != ''}
+        column_types.append(sql_types.get(value_types.pop(), '')
+                            if len(value_types) == 1 else '')
+    date_indices: List[int] = \
+        [i for i, x in enumerate(column_types) if x == 'DATE']
+    table: str = quote_sql_name(table_name)
+
+    def get_values(row: List[Any]) -> List[Any]:
+        values: List[Any] = [None if x == '' else x for x in row]
+        for idx in date_indices:
+            if isinstance(values[idx], date):  # later batches may differ
+                values[idx] = values[idx].isoformat()
+        return values
+
+    temp_path: str = path + '.tmp'
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path, isolation_level=None)
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            connection.execute('PRAGMA ' + pragma)
+        connection.execute('CREATE TABLE {} ({})'.format(table, ', '.join(
+            '{} {}'.format(quote_sql_name(name), column_type).rstrip()
+            for name, column_type in zip(header, column_types))))
+        insert: str = 'INSERT INTO {} VALUES ({})'.format(
+            table, ', '.join('?' * len(header)))
+        connection.execute('BEGIN')
+        while batch:
+            connection.executemany(insert, map(get_values, batch))
+            batch = list(islice(rows, SQLITE_BATCH_ROWS))
+        for fields in SQLITE_INDEXES:
+            if all(x in header for x in fields):
+                connection.execute('CREATE INDEX {} ON {} ({})'.format(
+                    quote_sql_name('_'.join((table_name,) + fields).lower()),
+                    table, ', '.join(map(quote_sql_name, fields))))
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.close()
+        os.remove(temp_path)
+        raise
+    connection.close()
+    os.replace(temp_path, path)
+
+
+WRITERS: Dict[str, Callable] = {
+    'csv': save_csv,
+    'parquet': save_parquet,
+    'feather': save_feather,
+    'npy': save_npy,
+    'xlsx': save_xlsx,
+    'sqlite': save_sqlite,
+}
+
+
+def get_output_path(
+    path: str,
+    output_format: str = 'csv',
+    compression: str = 'none',
+) -> str:
+    """Get output path for an output format
+
+    A '.csv' extension, as in the default output paths, is replaced with the
+    format's extension. Other paths are used as is. Compressed CSV paths get
+    the compression's extension appended, e.g. 'output.csv.gz', unless they
+    already end with it.
+
+    Args:
+        path (str): Configured output path
+        output_format (str): One of OUTPUT_FORMATS
+        compression (str): One of CSV_COMPRESSIONS
+
+    Returns:
+        str: Output path
+    """
+    if output_format == 'csv':
+        extension: str = CSV_COMPRESSION_EXTENSIONS[compression]
+        if path.lower().endswith(extension):
+            return path
+        return path + extension
+    root, extension = os.path.splitext(path)
+    if extension.lower() != '.csv':
+        return path
+
+    return root + OUTPUT_FORMAT_EXTENSIONS[output_format]
+
+
+def get_partition_dir_name(
+    field: str,
+    value: Any,
+) -> str:
+    """Get Hive-style directory name of a partition, e.g. 'date=2019-12-01'
+
+    Characters which are not safe in paths are percent-encoded, and empty
+    values are named as Hive names them.
+
+    Args:
+        field (str): Field partitioned by
+        value: Partition's value of field
+
+    Returns:
+        str: Directory name
+    """
+    from urllib.parse import quote
+
+    text: str = '' if value is None else str(value)
+
+    return '{}={}'.format(
+        field.lower(), quote(text, safe=" ,'-") or PARTITION_NULL_VALUE)
+
+
+class _Part:
+    """Part file being written, of a partitioned dataset
+
+    CSV parts are streamed to disk in chunks of PARTITION_BUFFER_ROWS. Parts
+    in other formats are saved when closed, so their rows are held until
+    then.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        header: List[str],
+        output_format: str,
+        compression: str,
+        sheet_name: str,
+        cache: CsvEncodingCache,
+    ):
+        self.path: str = path
+        self.output_format: str = output_format
+        self.sheet_name: str = sheet_name
+        self.cache: CsvEncodingCache = cache
+        self.num_rows: int = 0
+        self.rows: List[List[Any]] = [header]
+        self.file: Any = open_csv_output(path, compression) \
+            if output_format == 'csv' else None
+
+    def append(self, row: List[Any]):
+        self.rows.append(row)
+        self.num_rows += 1
+        if self.file is not None and len(self.rows) >= PARTITION_BUFFER_ROWS:
+            self.flush()
+
+    def flush(self):
+        for chunk in iter_csv_chunks(self.rows, cache=self.cache):
+            self.file.write(chunk.encode('utf-8'))
+        self.rows = []
+
+    def close(self):
+        if self.file is None:
+            if self.output_format in ('xlsx', 'sqlite'):
+                WRITERS[self.output_format](
+                    self.rows, self.path, self.sheet_name)
+            else:
+                WRITERS[self.output_format](self.rows, self.path)
+        else:
+            self.flush()
+            self.file.close()
+        self.rows = []
+
+
+def save_partitioned(
+    array: Iterable[List[Any]],
+    path: str,
+    partition_by: str,
+    rows_per_part: int = PARTITION_ROWS_PER_PART,
+    output_format: str = 'csv',
+    compression: str = 'none',
+    sheet_name: str = XLSX_SHEET_NAME,
+):
+    """Save 2d array as a Hive-style partitioned dataset directory
+
+    Rows are saved to a directory per value of the partition field, e.g.
+    'date=2019-12-01', in part files of at most rows_per_part rows, e.g.
+    'part-0000.csv'. Each part is a dataset of its own, with a header row and
+    the partition field, so that partitions can be loaded or refreshed one at
+    a time. Rows of a partition keep their order, across its parts.
+
+    Rows need not be grouped by partition. Up to PARTITION_MAX_OPEN parts are
+    open at a time; if a row's part was closed to open another, the rest of
+    its partition goes into a new part. CSV parts are streamed to disk, so
+    memory use is bounded by the number of open parts, not of rows. Parts in
+    other formats hold their rows until saved.
+
+    Existing part files of partitions which are written to are replaced.
+    Other partitions in the directory are left as they are.
+
+    Args:
+        array (iter): 2d array, including header
+        path (str): Path to dataset directory
+        partition_by (str): Field to partition by, e.g. 'Date'
+        rows_per_part (int): Max rows per part file, not including header
+        output_format (str): Format of part files, one of OUTPUT_FORMATS
+        compression (str): One of CSV_COMPRESSIONS. Only applies to CSV.
+        sheet_name (str): Name of sheet of xlsx, or of table of sqlite.
+
+    Raises:
+        ValueError: If the header does not have the partition field, or
+        rows_per_part is not positive
+
+    Side effects:
+        - Saves partition directories and part files, and removes replaced
+        part files
+    """
+    if rows_per_part < 1:
+        raise ValueError('Rows per part must be positive.')
+    rows: Iterator[List[Any]] = iter(array)
+    header: List[str] = next(rows, [])
+    if partition_by not in header:
+        raise ValueError('Cannot partition by "{}", as it is not in the '
+                         'header.'.format(partition_by))
+    field_idx: int = header.index(partition_by)
+    cache = CsvEncodingCache()
+    part_file_name: str = \
+        get_output_path(PART_FILE_NAME, output_format, compression)
+    open_parts: OrderedDict = OrderedDict()  # least recently used first
+    num_parts: Dict[str, int] = {}  # by partition directory
+
+    def open_part(value: Any) -> _Part:
+        if len(open_parts) >= PARTITION_MAX_OPEN:
+            open_parts.popitem(last=False)[1].close()
+        dir_path: str = \
+            os.path.join(path, get_partition_dir_name(partition_by, value))
+        part_idx: Optional[int] = num_parts.get(dir_path)
+        if part_idx is None:
+            part_idx = 0
+            os.makedirs(dir_path, exist_ok=True)
+            for file_name in os.listdir(dir_path):
+                if file_name.startswith(PART_FILE_PREFIX):
+                    _remove_path(os.path.join(dir_path, file_name))
+        num_parts[dir_path] = part_idx + 1
+        part = _Part(
+            path=os.path.join(dir_path, part_file_name.format(part_idx)),
+            header=header,
+            output_format=output_format,
+            compression=compression,
+            sheet_name=sheet_name,
+            cache=cache)
+        open_parts[value] = part
+
+        return part
+
+    os.makedirs(path, exist_ok=True)
+    value: Any = object()  # no row's value
+    part: Optional[_Part] = None
+    for row in rows:
+        if row[field_idx] != value:
+            value = row[field_idx]
+            part = open_parts.get(value)
+            if part is None:
+                part = open_part(value)
+            else:
+                open_parts.move_to_end(value)
+        if part.num_rows >= rows_per_part:
+            del open_parts[value]
+            part.close()
+            part = open_part(value)
+        part.append(row)
+    for part in open_parts.values():
+        part.close()
+
+
+def _remove_path(path: str):
+    if os.path.isdir(path):  # npy parts are directories
+        for file_name in os.listdir(path):
+            os.remove(os.path.join(path, file_name))
+        os.rmdir(path)
+    else:
+        os.remove(path)
+
+
+def save_dataset(
+    array: Iterable[List[Any]],
+    path: str,
+    output_format: str = 'csv',
+    compression: str = 'none',
+    sheet_name: str = XLSX_SHEET_NAME,
+    partition_by: str = None,
+    rows_per_part: int = PARTITION_ROWS_PER_PART,
+) -> str:
+    """Save 2d array in the given output format
+
+    Parquet and Feather require pyarrow. If it is not installed, columns are
+    saved as .npy files instead. Likewise, zstd compression requires
+    zstandard, else CSV is gzip compressed instead.
+
+    If partitioned, the dataset is saved as a directory of part files in the
+    output format, see `save_partitioned`. The directory is named as the
+    output path, without its '.csv' extension.
+
+    Args:
+        array (iter): 2d array, including header
+        path (str): Configured output path, see `get_output_path`
+        output_format (str): One of OUTPUT_FORMATS
+        compression (str): One of CSV_COMPRESSIONS. Only applies to CSV.
+        sheet_name (str): Name of sheet of xlsx, or of table of sqlite.
+        partition_by (str): Field to partition by, if any, e.g. 'Date'
+        rows_per_part (int): Max rows per part file, if partitioned
+
+    Raises:
+        ValueError: If output format is unknown, or dataset cannot be
+        partitioned as given
+
+    Side effects:
+        - Saves output file(s)
+
+    Returns:
+        str: Path saved to
+    """
+    if output_format not in WRITERS:
+        raise ValueError('Unknown output format "{}". Expected one of: {}'
+                         .format(output_format, ', '.join(WRITERS)))
+    if output_format in ('parquet', 'feather') \
+            and import_optional('pyarrow') is None:
+        print('pyarrow is not installed. Saving .npy columns instead of {}.'
+              .format(output_format))
+        output_format = 'npy'
+    if output_format != 'csv':
+        compression = 'none'
+    elif compression == 'zstd' and import_optional('zstandard') is None:
+        print('zstandard is not installed. Compressing with gzip instead.')
+        compression = 'gzip'
+    if partition_by:
+        root, extension = os.path.splitext(path)
+        output_path: str = root if extension.lower() == '.csv' else path
+        save_partitioned(array, output_path, partition_by, rows_per_part,
+                         output_format, compression, sheet_name)
+        return output_path
+    output_path: str = get_output_path(path, output_format, compression)
+    if output_format == 'csv':
+        save_csv(array, output_path, compression)
+    elif output_format in ('xlsx', 'sqlite'):
+        WRITERS[output_format](array, output_path, sheet_name)
+    else:
+        WRITERS[output_format](array, output_path)
+
+    return output_path
+
+
+def add_output_arguments(
+    parser: Any,
+    config: Dict[str, Any],
+):
+    """Add output path and format options to a command line parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+        config (dict): Configuration, for 'output_file_path',
+        'output_format', 'output_compression', 'output_sheet_name',
+        'output_partition_by' and 'output_rows_per_part' defaults
+    """
+    parser.add_argument(
+        '-o', '--output', dest='output_file_path', metavar='PATH',
+        default=config['output_file_path'],
+        help='Path to save output file. A .csv extension is replaced for '
+             'other formats (default: %(default)s)')
+    parser.add_argument(
+        '-f', '--format', dest='output_format', choices=OUTPUT_FORMATS,
+        default=config['output_format'],
+        help='Output format. parquet and feather need pyarrow, else fall '
+             'back to npy, which needs NumPy (default: %(default)s)')
+    parser.add_argument(
+        '-z', '--compression', dest='output_compression',
+        choices=CSV_COMPRESSIONS,
+        default=config.get('output_compression', 'none'),
+        help='Compression of csv output. zstd needs zstandard, else falls '
+             'back to gzip (default: %(default)s)')
+    parser.add_argument(
+        '--sheet', dest='output_sheet_name', metavar='NAME',
+        default=config.get('output_sheet_name', XLSX_SHEET_NAME),
+        help='Sheet name of xlsx output, which needs openpyxl, or table '
+             'name of sqlite output (default: %(default)s)')
+    parser.add_argument(
+        '--partition-by', dest='output_partition_by', metavar='FIELD',
+        default=config.get('output_partition_by'),
+        help='Save a directory with a Hive-style partition per value of '
+             'FIELD, e.g. Date for date=2019-12-01/part-0000.csv')
+    parser.add_argument(
+        '--rows-per-part', dest='output_rows_per_part', type=int,
+        metavar='N',
+        default=config.get('output_rows_per_part', PARTITION_ROWS_PER_PART),
+        help='Max rows per part file of partitioned output '
+             '(default: %(default)s)')
+
+
+def add_input_sheet_argument(
+    parser: Any,
+    config: Dict[str, Any],
+):
+    """Add input sheet option to a command line parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+        config (dict): Configuration, for 'input_sheet_name' default
+    """
+    parser.add_argument(
+        '--input-sheet', dest='input_sheet_name', metavar='NAME',
+        default=config['input_sheet_name'],
+        help='Sheet to read, if input is an Excel workbook, which needs '
+             'openpyxl (default: %(default)s)')
+
+
+def add_prefetch_argument(
+    parser: Any,
+    config: Dict[str, Any],
+):
+    """Add input prefetch option to a command line parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+        config (dict): Configuration, for 'input_prefetch' default
+    """
+    parser.add_argument(
+        '--prefetch', dest='input_prefetch', action='store_true',
+        default=config['input_prefetch'],
+        help='Read input on a background thread, while rows read so far are '
+             'converted. Helps with slow, e.g. network, drives.')
+
+
+def import_optional(module_name: str) -> Optional[ModuleType]:
+    """Import an optional dependency, only when it is first needed
+
+    Args:
+        module_name (str): Name of module to import
+
+    Returns:
+        module: Imported module, or None if it is not installed
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
@@ -0,0 +1,296 @@
+"""Memory-mapped binary cache of wide personnel datasets
+
+Parsing a wide CSV is most of the cost of a transform, and transforms are
+often rerun on the same input. The first run with a cache parses the input
+once, and saves each cell as a code into one table of the input's distinct
+strings: the codes as a 2d '.npy' array, and the strings, header and input
+key in a '.json' side file. Later runs map the codes in with
+`numpy.load(mmap_mode='r')`, so columns can be read without copying, and
+rows are decoded a batch at a time with array indexing rather than parsed
+from text.
+
+A cache is keyed by the input file's size, modification time and SHA-256
+hash, and is rebuilt when any of them changes. Requires NumPy.
+
+Usage:
+    `cache = load_wide_cache('input.csv'); rows = cache.iter_rows()`
+"""
+import hashlib
+import json
+import os
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from tidy_table import Categories
+from utils import import_optional, iter_dataset
+
+CACHE_DIR: str = './.wide_cache'
+CACHE_VERSION: int = 1
+HASH_CHUNK_BYTES: int = 1 << 20
+DECODE_BATCH_ROWS: int = 2000
+
+
+def get_input_key(
+    path: str,
+    sheet_name: str = None,
+    date_format: str = None,
+) -> Dict[str, Any]:
+    """Get the key which identifies an input file's contents
+
+    Args:
+        path (str): Path to input file
+        sheet_name (str): Sheet read, if a workbook
+        date_format (str): Format dates are read in, if a workbook
+
+    Returns:
+        dict: Size, modification time, SHA-256 hex digest, and how the file
+        is read
+    """
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            sha256.update(chunk)
+    stat: os.stat_result = os.stat(path)
+
+    return {'version': CACHE_VERSION, 'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns, 'sha256': sha256.hexdigest(),
+            'sheet_name': sheet_name, 'date_format': date_format}
+
+
+def get_cache_path(
+    path: str,
+    cache_dir: str = CACHE_DIR,
+) -> str:
+    """Get path of an input file's cache, without extension
+
+    Args:
+        path (str): Path to input file
+        cache_dir (str): Cache directory
+
+    Returns:
+        str: Path
+    """
+    file_name: str = \
+        hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+
+    return os.path.join(cache_dir, file_name)
+
+
+class WideCache:
+    """Dictionary-encoded wide dataset, with codes mapped from disk
+
+    Attributes:
+        header (list): Field names, in column order
+        strings (list): Distinct cell values, indexed by code
+        codes (numpy.ndarray): Code of each cell, one row per dataset row,
+        not including header. Memory mapped, read only.
+    """
+
+    def __init__(
+        self,
+        header: List[str],
+        strings: List[str],
+        codes: Any,
+    ):
+        """Create cache
+
+        Args:
+            header (list): Field names, in column order
+            strings (list): Distinct cell values, indexed by code
+            codes (numpy.ndarray): Code of each cell
+        """
+        self.header: List[str] = header
+        self.strings: List[str] = strings
+        self.codes: Any = codes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def column(self, field: str) -> Any:
+        """Get codes of a column, without copying
+
+        Args:
+            field (str): Field name
+
+        Returns:
+            numpy.ndarray: Code of each row's value, see `strings`
+        """
+        return self.codes[:, self.header.index(field)]
+
+    def iter_rows(
+        self,
+        converters: Dict[int, Callable[[str], Any]] = None,
+        fields: Sequence[str] = None,
+    ) -> Iterator[List[Any]]:
+        """Decode rows, a batch at a time
+
+        Each converter is only called once per distinct string of the
+        columns it converts, so rows are formatted as well as decoded by
+        array indexing.
+
+        Args:
+            converters (dict): Raw string to value function, by column
+            index. Other columns are decoded as strings.
+            fields (list): Fields to decode, e.g. only those a transform
+            reads. Rows then only have these columns, in header order, and
+            so does the header yielded. Defaults to all.
+
+        Returns:
+            iter: Rows as lists, including header
+        """
+        np = import_optional('numpy')
+        converters = converters or {}
+        columns: List[int] = list(range(len(self.header))) if fields is None \
+            else sorted(self.header.index(x) for x in fields)
+        strings = np.array(self.strings, dtype=object)
+
+        # one lookup table, and columns in and out, per converter
+        column_groups: Dict[Optional[Callable], List[int]] = {}
+        for out_idx, idx in enumerate(columns):
+            column_groups.setdefault(converters.get(idx), []).append(out_idx)
+        lookups: List[Any] = []
+        for convert, out_indices in column_groups.items():
+            indices = np.array([columns[x] for x in out_indices])
+            lookup = strings
+            if convert is not None:
+                lookup = np.full(len(strings), None, dtype=object)
+                for code in np.unique(self.codes[:, indices]).tolist():
+                    lookup[code] = convert(self.strings[code])
+            lookups.append((indices, np.array(out_indices), lookup))
+
+        yield [self.header[x] for x in columns]
+        for start in range(0, len(self.codes), DECODE_BATCH_ROWS):
+            batch = self.codes[start:start + DECODE_BATCH_ROWS]
+            rows = np.empty((len(batch), len(columns)), dtype=object)
+            for indices, out_indices, lookup in lookups:
+                rows[:, out_indices] = lookup[batch[:, indices]]
+            yield from rows.tolist()
+
+
+def save_wide_cache(
+    rows: Iterator[List[str]],
+    key: Dict[str, Any],
+    cache_path: str,
+) -> bool:
+    """Encode rows of strings, and save them as a cache
+
+    Args:
+        rows (iter): Rows, including header
+        key (dict): Input key, see `get_input_key`
+        cache_path (str): Path of cache, without extension
+
+    Side effects:
+        - Saves '.npy' and '.json' cache files
+
+    Returns:
+        bool: Saved? False if there is no header, or rows differ in width,
+        so cannot be cached.
+    """
+    np = import_optional('numpy')
+    header: Optional[List[str]] = next(rows, None)
+    if header is None:
+        return False
+    width: int = len(header)
+    categories = Categories()
+    encode: Callable = categories.__getitem__
+    codes = array('I')
+    for row in rows:
+        if len(row) != width:
+            return False
+        codes.extend(map(encode, row))
+
+    num_codes: int = len(categories.values)
+    dtype: str = 'uint8' if num_codes <= 1 << 8 \
+        else 'uint16' if num_codes <= 1 << 16 else 'uint32'
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    # codes first, so that a side file always describes saved codes
+    with open(cache_path + '.npy.tmp', 'wb') as f:
+        np.save(f, np.frombuffer(codes, dtype='uint32').astype(dtype)
+                .reshape(-1, width))
+    os.replace(cache_path + '.npy.tmp', cache_path + '.npy')
+    with open(cache_path + '.json.tmp', 'w') as f:
+        json.dump({'key': key, 'header': header,
+                   'strings': categories.values}, f)
+    os.replace(cache_path + '.json.tmp', cache_path + '.json')
+
+    return True
+
+
+def load_wide_cache(
+    path: str,
+    cache_dir: str = CACHE_DIR,
+    sheet_name: str = None,
+    date_format: str = '%Y-%m-%d',
+    prefetch: bool = False,
+) -> Optional[WideCache]:
+    """Map in an input file's cache, first building it if it is missing or
+    out of date
+
+    Args:
+        path (str): Path to input file: a CSV file, possibly compressed, or
+        a workbook
+        cache_dir (str): Cache directory
+        sheet_name (str): Name of sheet to read, if a workbook
+        date_format (str): Format of dates, if a workbook
+        prefetch (bool): Read input on a background thread, if building
+
+    Raises:
+        ImportError: If NumPy is not installed
+
+    Side effects:
+        - Saves cache files, if building
+
+    Returns:
+        WideCache: Cache, or None if input cannot be cached, see
+        `save_wide_cache`
+    """
+    np = import_optional('numpy')
+    if np is None:
+        raise ImportError('NumPy is required to cache input.')
+    key: Dict[str, Any] = get_input_key(path, sheet_name, date_format)
+    cache_path: str = get_cache_path(path, cache_dir)
+    cache: Optional[WideCache] = _read_wide_cache(cache_path, key)
+    if cache is None and save_wide_cache(
+            iter_dataset(path, sheet_name, date_format, prefetch),
+            key, cache_path):
+        cache = _read_wide_cache(cache_path, key)
+
+    return cache
+
+
+def _read_wide_cache(
+    cache_path: str,
+    key: Dict[str, Any],
+) -> Optional[WideCache]:
+    np = import_optional('numpy')
+    try:
+        with open(cache_path + '.json') as f:
+            side: Dict[str, Any] = json.load(f)
+        if side['key'] != key:
+            return None
+        return WideCache(side['header'], side['strings'],
+                         np.load(cache_path + '.npy', mmap_mode='r'))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def add_cache_arguments(
+    parser: Any,
+    config: Dict[str, Any],
+):
+    """Add input cache options to a command line parser
+
+    Args:
+        parser (argparse.ArgumentParser): Parser
+        config (dict): Configuration, for 'input_cache' and
+        'input_cache_dir' defaults
+    """
+    parser.add_argument(
+        '--cache', dest='input_cache', action='store_true',
+        default=config['input_cache'],
+        help='Read input from a binary cache, built on first use and '
+             'rebuilt when input changes. Needs NumPy.')
+    parser.add_argument(
+        '--cache-dir', dest='input_cache_dir', metavar='PATH',
+        default=config['input_cache_dir'],
+        help='Directory of input caches (default: %(default)s)')